@@ -0,0 +1,4 @@
+"""
+Marks the repository root for pytest: it is put on sys.path, so tests import
+the app and script code as top-level packages without editing sys.path.
+"""
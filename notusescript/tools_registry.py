@@ -10,6 +10,9 @@ Based on official CrewAI Tools documentation:
 https://docs.crewai.com/tools
 """
 
+import re
+from functools import lru_cache
+
 # Available tools from crewai-tools package
 SEARCH_TOOLS = {
     'serper_dev': {
@@ -284,13 +287,58 @@ DATA_TOOLS = {
     }
 }
 
-# Master registry combining all tools
-ALL_TOOLS = {
-    **SEARCH_TOOLS,
-    **FILE_TOOLS,
-    **DATA_TOOLS
+# Master registry combining all tools (a plain dict: update_tool_status writes through it)
+ALL_TOOLS = {}
+ALL_TOOLS.update(SEARCH_TOOLS)
+ALL_TOOLS.update(FILE_TOOLS)
+ALL_TOOLS.update(DATA_TOOLS)
+
+# Matching is case-insensitive: the index keys are lowercased once, here, instead of per
+# lookup; ALL_TOOLS keeps the original spelling for display
+# Lowercased role -> tool names, in registry order
+ROLE_INDEX = {}
+# Lowercased context trigger -> tool names, so keyword lookup is one regex pass over the text
+TRIGGER_TO_TOOLS = {}
+for _tool_name, _tool_info in ALL_TOOLS.items():
+    for _role in _tool_info['suitable_for']:
+        _tools = ROLE_INDEX.setdefault(_role.lower(), [])
+        if _tool_name not in _tools:
+            _tools.append(_tool_name)
+    for _trigger in _tool_info['context_triggers']:
+        _tools = TRIGGER_TO_TOOLS.setdefault(_trigger.lower(), [])
+        if _tool_name not in _tools:
+            _tools.append(_tool_name)
+
+# A shorter trigger inside a longer one ("search" in "web search") is found with it
+_TRIGGER_CLOSURE = {
+    trigger: frozenset(name for other, names in TRIGGER_TO_TOOLS.items() if other in trigger for name in names)
+    for trigger in TRIGGER_TO_TOOLS
 }
 
+def _trie_pattern(words):
+    """Regex for a set of words, factored along a trie so shared prefixes are compared once."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # End of a word
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional tail: the longest word through this node is tried first
+        return '(?:' + body + ')?' if '' in node else body
+
+    return emit(trie)
+
+# Inside a lookahead so matches may overlap: at each position the longest trigger
+# wins, and every trigger occurring in the text is covered
+_TRIGGER_RE = re.compile("(?=(" + _trie_pattern(TRIGGER_TO_TOOLS) + "))")
+_TOOL_ORDER = {name: i for i, name in enumerate(ALL_TOOLS)}
+
 def get_tools_by_category(category):
     """Get all tools from a specific category."""
     if category == 'search':
@@ -308,70 +356,80 @@ def get_tool_by_name(tool_name):
 
 def get_tools_for_agent_role(agent_role):
     """Get all suitable tools for a specific agent role."""
-    suitable_tools = []
-    for tool_name, tool_info in ALL_TOOLS.items():
-        if agent_role.lower() in [role.lower() for role in tool_info['suitable_for']]:
-            suitable_tools.append(tool_name)
-    return suitable_tools
+    return list(ROLE_INDEX.get(agent_role.lower(), ()))
+
+@lru_cache(maxsize=512)
+def _tools_for_context(text_lower):
+    # findall returns the matched triggers without building a match object per hit
+    matched = set().union(*map(_TRIGGER_CLOSURE.__getitem__, set(_TRIGGER_RE.findall(text_lower))))
+    # Registry order, each tool once even if multiple triggers match
+    return tuple(sorted(matched, key=_TOOL_ORDER.__getitem__))
 
 def get_tools_by_context_keywords(text):
     """Get tools based on context keywords in the text."""
-    suitable_tools = []
-    text_lower = text.lower()
-    
-    for tool_name, tool_info in ALL_TOOLS.items():
-        for trigger in tool_info['context_triggers']:
-            if trigger in text_lower:
-                suitable_tools.append(tool_name)
-                break  # Add tool once even if multiple triggers match
-    
-    return suitable_tools
+    # Triggers are static (update_tool_status only touches status), so cached results never go stale
+    return list(_tools_for_context(text.lower()))
+
+# Filtered views of ALL_TOOLS, rebuilt after update_tool_status
+_AVAILABLE_CACHE = None
+_UNTESTED_CACHE = None
 
 def get_available_tools():
     """Get all tools that are confirmed to be available."""
-    return {name: info for name, info in ALL_TOOLS.items() 
-            if info['availability'] == 'confirmed'}
+    global _AVAILABLE_CACHE
+    if _AVAILABLE_CACHE is None:
+        _AVAILABLE_CACHE = {name: info for name, info in ALL_TOOLS.items() 
+                            if info['availability'] == 'confirmed'}
+    return dict(_AVAILABLE_CACHE)
 
 def get_untested_tools():
     """Get all tools that haven't been tested yet."""
-    return {name: info for name, info in ALL_TOOLS.items() 
-            if info['status'] == 'untested'}
+    global _UNTESTED_CACHE
+    if _UNTESTED_CACHE is None:
+        _UNTESTED_CACHE = {name: info for name, info in ALL_TOOLS.items() 
+                           if info['status'] == 'untested'}
+    return dict(_UNTESTED_CACHE)
 
 def update_tool_status(tool_name, status, notes=None):
     """Update the testing status of a tool."""
+    global _AVAILABLE_CACHE, _UNTESTED_CACHE
     if tool_name in ALL_TOOLS:
         ALL_TOOLS[tool_name]['status'] = status
         if notes:
             ALL_TOOLS[tool_name]['testing_notes'] = notes
+        _AVAILABLE_CACHE = _UNTESTED_CACHE = None
+
+# Display order for print_all_tools
+_CATEGORIES = (('Search Tools', SEARCH_TOOLS), ('File Tools', FILE_TOOLS), ('Data Tools', DATA_TOOLS))
 
 def print_tool_info(tool_name):
     """Print detailed information about a specific tool."""
     tool = get_tool_by_name(tool_name)
     if tool:
-        print(f"\n=== {tool['name']} ===")
-        print(f"Class: {tool['class']}")
-        print(f"Description: {tool['description']}")
-        print(f"Availability: {tool['availability']}")
-        print(f"Requirements: {', '.join(tool['requirements'])}")
-        print(f"Cost: {tool['cost']}")
-        print(f"Suitable for: {', '.join(tool['suitable_for'])}")
-        print(f"Context triggers: {', '.join(tool['context_triggers'])}")
-        print(f"Testing notes: {tool['testing_notes']}")
-        print(f"Status: {tool['status']}")
+        # One write for the whole block instead of a print per field
+        print("\n".join((
+            f"\n=== {tool['name']} ===",
+            f"Class: {tool['class']}",
+            f"Description: {tool['description']}",
+            f"Availability: {tool['availability']}",
+            f"Requirements: {', '.join(tool['requirements'])}",
+            f"Cost: {tool['cost']}",
+            f"Suitable for: {', '.join(tool['suitable_for'])}",
+            f"Context triggers: {', '.join(tool['context_triggers'])}",
+            f"Testing notes: {tool['testing_notes']}",
+            f"Status: {tool['status']}",
+        )))
     else:
         print(f"Tool '{tool_name}' not found in registry.")
 
 def print_all_tools():
     """Print information about all tools in the registry."""
-    print("\n=== TOOLS REGISTRY ===")
-    for category, tools in {
-        'Search Tools': SEARCH_TOOLS,
-        'File Tools': FILE_TOOLS,
-        'Data Tools': DATA_TOOLS
-    }.items():
-        print(f"\n--- {category} ---")
+    lines = ["\n=== TOOLS REGISTRY ==="]
+    for category, tools in _CATEGORIES:
+        lines.append(f"\n--- {category} ---")
         for tool_name in tools:
-            print(f"  - {tool_name}: {tools[tool_name]['status']}")
+            lines.append(f"  - {tool_name}: {tools[tool_name]['status']}")
+    print("\n".join(lines))
 
 if __name__ == "__main__":
     # Example usage
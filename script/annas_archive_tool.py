@@ -193,8 +193,9 @@ class AnnasArchiveTool(BaseTool):
                     else:
                         rag_db_path = os.path.join(project_root, "crews", "shared", "rag_db")
                     
-                    storage = RAGStorage(persist_directory=rag_db_path)
+                    storage = RAGStorage.get(rag_db_path)
                     storage.add_book(existing_file_path, book_id=query) # Use query as book_id for consistency
+                    storage.flush()
                     rag_status = "\n[RAG] Book confirmed indexed for querying."
                     debug_print("RAG indexing confirmed for existing book")
                 except Exception as e:
@@ -308,8 +309,9 @@ class AnnasArchiveTool(BaseTool):
                     rag_db_path = os.path.join(project_root, "crews", "shared", "rag_db")
                     print(f"[INFO] Using shared RAG DB: {rag_db_path}")
 
-                storage = RAGStorage(persist_directory=rag_db_path)
+                storage = RAGStorage.get(rag_db_path)
                 storage.add_book(path_for_rag, book_id=query)
+                storage.flush()
                 rag_status = "\n[RAG] Book indexed successfully for querying."
                 debug_print("RAG indexing successful")
             except Exception as e:
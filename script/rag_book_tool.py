@@ -69,7 +69,7 @@ class AskBookTool(BaseTool):
     def _init_storage(self):
         if self.storage is None:
             self._init_llm()
-            self.storage = RAGStorage(persist_directory=self._persist_directory, llm=self.llm)
+            self.storage = RAGStorage.get(self._persist_directory, llm=self.llm)
 
     def get_stats(self):
         """Public method to get RAG statistics."""
@@ -2,11 +2,20 @@ import os
 import warnings
 import json
 import re
+import hashlib
+import pickle
+import queue
+import atexit
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any, Tuple
 from langchain_community.document_loaders import PyPDFLoader, UnstructuredEPubLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+import numpy as np
 
 try:
     import networkx as nx
@@ -14,6 +23,16 @@ except ImportError:
     nx = None
     print("[WARNING] NetworkX not found. GraphRAG features will be disabled.")
 
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
+
+try:
+    import spacy
+except ImportError:
+    spacy = None
+
 # New import for HuggingFaceEmbeddings
 try:
     from langchain_huggingface import HuggingFaceEmbeddings
@@ -26,26 +45,298 @@ except ImportError:
     )
     from langchain_community.embeddings import HuggingFaceEmbeddings
 
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForFeatureExtraction = None
+
 # Suppress warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
+# Max concurrent LLM requests during summarization / graph extraction
+LLM_CONCURRENCY = 8
+
+# Token budgets for the text placed in each LLM prompt
+GRAPH_PROMPT_TOKENS = 1024
+SECTION_PROMPT_TOKENS = 4096
+MASTER_PROMPT_TOKENS = 5120
+
+# spaCy entity labels -> Knowledge Graph entity types
+SPACY_ENTITY_TYPES = {
+    "PERSON": "Character",
+    "ORG": "Organization",
+    "NORP": "Organization",
+    "GPE": "Location",
+    "LOC": "Location",
+    "FAC": "Location",
+    "PRODUCT": "Key Object",
+    "WORK_OF_ART": "Key Object",
+}
+
+# Precompiled patterns used on every query / graph extraction
+_CAP_WORD_RE = re.compile(r'\b[A-Z][a-z]+\b')
+_JSON_BLOB_RE = re.compile(r'\{.*\}', re.DOTALL)
+_WORD_RE = re.compile(r'\w+')
+
+# SimHash fingerprints within this Hamming distance are treated as near-duplicates
+NEAR_DUP_MAX_DISTANCE = 3
+# Only this prefix of a document is fingerprinted
+SIMHASH_CHARS = 512
+# Texts with fewer word shingles than this only get an exact-duplicate check:
+# a fingerprint over a handful of shingles collides too easily
+SIMHASH_MIN_SHINGLES = 8
+
+def _simhash(text: str, shingle_size: int = 5) -> Optional[int]:
+    """
+    64-bit SimHash over the word 5-gram shingles of the first SIMHASH_CHARS characters.
+    Returns None when there are fewer than SIMHASH_MIN_SHINGLES shingles.
+    """
+    words = text[:SIMHASH_CHARS].lower().split()
+    n = len(words) - shingle_size + 1
+    if n < SIMHASH_MIN_SHINGLES:
+        return None
+
+    # One builtin hash per word; shingle hashes are the xor of position-rotated word
+    # hashes, computed for all shingles at once (fingerprints are only compared within a process)
+    word_hashes = np.array([hash(word) for word in words], dtype=np.int64).view(np.uint64)
+    hashes = word_hashes[:n].copy()
+    for j in range(1, shingle_size):
+        shift = np.uint64(7 * j)
+        part = word_hashes[j:j + n]
+        hashes ^= (part << shift) | (part >> (np.uint64(64) - shift))
+
+    # Each shingle votes on every bit; the majority sets the fingerprint bit
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(-1, 64)
+    votes = bits.sum(axis=0) * 2 > n
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+EMBEDDING_MODEL_NAME = "BAAI/bge-m3"
+
+# Where the one-time ONNX export of the embedding model is kept
+ONNX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bge-m3-onnx")
+
+def build_text_splitter(tokenizer=None) -> RecursiveCharacterTextSplitter:
+    """
+    Splits on the embedding model's own (Rust-backed) tokenizer so chunk size
+    maps directly onto model tokens; falls back to characters without one.
+    """
+    if tokenizer is not None:
+        return RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+            tokenizer,
+            chunk_size=256,
+            chunk_overlap=50,
+            add_start_index=True,
+        )
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        add_start_index=True,
+    )
+
+# Per-process splitter used when parse_and_split runs in a worker process; its tokenizer
+# is set by init_worker_text_splitter so workers split like the parent's RAGStorage
+_worker_text_splitter = None
+_worker_tokenizer_name = EMBEDDING_MODEL_NAME
+
+def init_worker_text_splitter(tokenizer_name: Optional[str]):
+    """
+    ProcessPoolExecutor initializer. Pass RAGStorage.splitter_tokenizer: a tokenizer
+    name or path, or None for the character splitter.
+    """
+    global _worker_text_splitter, _worker_tokenizer_name
+    _worker_tokenizer_name = tokenizer_name
+    _worker_text_splitter = None
+
+def _get_worker_text_splitter() -> RecursiveCharacterTextSplitter:
+    global _worker_text_splitter
+    if _worker_text_splitter is None:
+        tokenizer = None
+        if _worker_tokenizer_name is not None:
+            # No character fallback: other chunk boundaries would give other chunk ids
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(_worker_tokenizer_name)
+        _worker_text_splitter = build_text_splitter(tokenizer)
+    return _worker_text_splitter
+
+def parse_and_split(file_path: str, book_id: str, text_splitter: Optional[RecursiveCharacterTextSplitter] = None) -> Tuple[List[Document], str]:
+    """
+    Loads a book file and splits it into chunks (CPU-bound, safe to run in a worker process).
+    Returns (chunks, full_text). Raises on load errors.
+    """
+    if text_splitter is None:
+        text_splitter = _get_worker_text_splitter()
+
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        pages = PyPDFLoader(file_path).lazy_load()
+    elif ext == ".epub":
+        pages = UnstructuredEPubLoader(file_path).lazy_load()
+    else:
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+            pages = iter([Document(page_content=text, metadata={"source": file_path})])
+
+    # Stream pages straight into the splitter, adding metadata on the way;
+    # page texts are collected and joined once into full_text
+    parts = []
+    page_offsets = []
+    def annotate(pages):
+        offset = 0
+        for i, doc in enumerate(pages):
+            doc.metadata["book_id"] = book_id
+            doc.metadata["type"] = "chunk"
+            doc.metadata["chunk_index"] = i
+            parts.append(doc.page_content)
+            page_offsets.append(offset)
+            offset += len(doc.page_content) + 1 # +1 for the " " separator in full_text
+            yield doc
+
+    chunks = text_splitter.split_documents(annotate(pages))
+    full_text = " ".join(parts)
+
+    # Enrich chunks with book-wide character positions: the splitter's
+    # start_index (add_start_index=True) is relative to the chunk's page
+    for chunk in chunks:
+        start = page_offsets[chunk.metadata["chunk_index"]] + max(0, chunk.metadata.pop("start_index", 0))
+        chunk.metadata["start_char"] = start
+        chunk.metadata["end_char"] = start + len(chunk.page_content)
+
+    return chunks, full_text
+
+class BGEEmbeddings(HuggingFaceEmbeddings):
+    """HuggingFaceEmbeddings that tokenizes a document list once and runs the model over slices."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if torch is None or not texts:
+            return super().embed_documents(texts)
+
+        batch_size = self.encode_kwargs.get("batch_size", 32)
+        features = self.client.tokenize(texts)
+        device = self.client.device
+
+        embeddings = []
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                # Trim the shared padding down to this slice's longest sequence
+                mask = features["attention_mask"][start:start + batch_size]
+                width = int(mask.sum(dim=1).max())
+                batch = {k: v[start:start + batch_size, :width].to(device) for k, v in features.items()}
+
+                # Upcast before normalizing to avoid bf16 accumulation error
+                output = self.client(batch)["sentence_embedding"].float()
+                output = torch.nn.functional.normalize(output, p=2, dim=1)
+                embeddings.extend(output.cpu().tolist())
+        return embeddings
+
+def _onnx_export_cached(cache_dir: str = ONNX_CACHE_DIR) -> bool:
+    """True if cache_dir holds a finished ONNX export (model and tokenizer)."""
+    try:
+        names = set(os.listdir(cache_dir))
+    except OSError:
+        return False
+    return "model.onnx" in names and "tokenizer_config.json" in names
+
+class ORTEmbeddings(Embeddings):
+    """BGE-M3 embeddings served by an ONNX Runtime export (CLS pooling, L2-normalized)."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, cache_dir: str = ONNX_CACHE_DIR,
+                 batch_size: int = 32, provider: str = "CPUExecutionProvider"):
+        self.batch_size = batch_size
+        if _onnx_export_cached(cache_dir):
+            self.model = ORTModelForFeatureExtraction.from_pretrained(cache_dir, provider=provider)
+            self.tokenizer = AutoTokenizer.from_pretrained(cache_dir)
+        else:
+            # First run: export to ONNX once and keep it for later runs
+            print(f"[INFO] Exporting {model_name} to ONNX in {cache_dir}. This one-time step can take several minutes...")
+            self.model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True, provider=provider)
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model.save_pretrained(cache_dir)
+            self.tokenizer.save_pretrained(cache_dir)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            features = self.tokenizer(texts[start:start + self.batch_size], padding=True,
+                                      truncation=True, return_tensors="np")
+            hidden = self.model(**features).last_hidden_state
+            # Same CLS pooling as the sentence-transformers BGE-M3 config, so vectors stay compatible
+            cls = np.asarray(hidden[:, 0], dtype=np.float32)
+            cls /= np.linalg.norm(cls, axis=1, keepdims=True)
+            embeddings.extend(cls.tolist())
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+# Open RAGStorage instances keyed by resolved persist directory (see RAGStorage.get)
+_STORAGE_CACHE: Dict[str, "RAGStorage"] = {}
+
 class RAGStorage:
-    def __init__(self, persist_directory: str = "crews/shared/rag_db", llm=None):
+    @classmethod
+    def get(cls, persist_directory: str = "crews/shared/rag_db", llm=None) -> "RAGStorage":
+        """Returns the shared instance for persist_directory, opening it on first use."""
+        key = os.path.realpath(persist_directory)
+        storage = _STORAGE_CACHE.get(key)
+        if storage is None:
+            storage = _STORAGE_CACHE[key] = cls(persist_directory=persist_directory, llm=llm)
+        elif llm is not None:
+            storage.llm = llm
+        return storage
+
+    def __init__(self, persist_directory: str = "crews/shared/rag_db", llm=None, embed_batch_size: int = 64, use_llm_ner: bool = False,
+                 use_onnx: Optional[bool] = None):
         self.persist_directory = persist_directory
         self.llm = llm # Use provided LLM
+        self.use_llm_ner = use_llm_ner # Force LLM entity extraction instead of local spaCy NER
+        self._nlp = None # spaCy pipeline, loaded lazily by _get_nlp
+        self.embed_batch_size = embed_batch_size # Chunks per embedding call / vector store write
         
         # Graph storage path
-        self.graph_path = os.path.join(self.persist_directory, "knowledge_graph.gml")
+        self.graph_path = os.path.join(self.persist_directory, "knowledge_graph.pkl")
+        legacy_graph_path = os.path.join(self.persist_directory, "knowledge_graph.gml")
         self.graph = nx.Graph() if nx else None
+        self._graph_dirty = False # Set on mutation; save_graph is a no-op otherwise
         
-        # Load existing graph if available
-        if self.graph and os.path.exists(self.graph_path):
+        # Load existing graph if available (binary pickle; GML only for one-time migration)
+        if self.graph is not None and os.path.exists(self.graph_path):
             try:
-                self.graph = nx.read_gml(self.graph_path)
+                with open(self.graph_path, "rb") as f:
+                    self.graph = pickle.load(f)
                 print(f"[INFO] Loaded Knowledge Graph with {self.graph.number_of_nodes()} nodes and {self.graph.number_of_edges()} edges.")
             except Exception as e:
                 print(f"[WARNING] Could not load existing graph: {e}. Starting fresh.")
                 self.graph = nx.Graph()
+        elif self.graph is not None and os.path.exists(legacy_graph_path):
+            try:
+                self.graph = nx.read_gml(legacy_graph_path)
+                print(f"[INFO] Migrating Knowledge Graph from {legacy_graph_path} to {self.graph_path}")
+                self._graph_dirty = True
+                self.save_graph()
+            except Exception as e:
+                print(f"[WARNING] Could not load existing graph: {e}. Starting fresh.")
+                self.graph = nx.Graph()
+
+        # Lowercased name token -> graph nodes containing it, for O(1) entity lookup
+        self._node_index = {}
+        if self.graph is not None:
+            for node in self.graph.nodes():
+                self._index_node(node)
+
+        # Read-only igraph copy for fast neighbor queries (None when stale or igraph missing)
+        self._ig = None
+        self._ig_vid = {}
+        self._materialize_igraph()
 
         # If no LLM is provided, initialize a default one for summarization
         if self.llm is None:
@@ -60,12 +351,33 @@ class RAGStorage:
                 print("Summarization will be skipped unless an LLM is explicitly provided.")
         
         # Use a real embedding model if possible (Upgraded to BGE-M3 for superior RAG quality)
-        try:
-            self.embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-m3")
-        except Exception:
-            print("Warning: HuggingFaceEmbeddings (bge-m3) not available. Using fake embeddings.")
-            from langchain_community.embeddings import DeterministicFakeEmbedding
-            self.embeddings = DeterministicFakeEmbedding(size=1024)
+        self.embeddings = None
+        # On CPU the ONNX Runtime export is considerably faster than eager PyTorch, but the
+        # one-time export is slow and memory hungry: it only runs when opted in (use_onnx or
+        # RAG_USE_ONNX=true); an export already in ONNX_CACHE_DIR is always reused
+        if use_onnx is None:
+            use_onnx = os.getenv("RAG_USE_ONNX", "").strip().lower() in ("1", "true", "yes")
+        if (ORTModelForFeatureExtraction is not None and not (torch is not None and torch.cuda.is_available())
+                and (use_onnx or _onnx_export_cached())):
+            try:
+                self.embeddings = ORTEmbeddings(batch_size=self.embed_batch_size)
+            except Exception as e:
+                print(f"[ERROR] ONNX Runtime embeddings for {EMBEDDING_MODEL_NAME} unavailable, falling back to PyTorch: {e}")
+        if self.embeddings is None:
+            try:
+                model_kwargs = {}
+                if torch is not None and torch.cuda.is_available():
+                    # Native bf16 weights on GPU; CPU stays fp32 where bf16 kernels are often slower
+                    model_kwargs["model_kwargs"] = {"torch_dtype": torch.bfloat16}
+                self.embeddings = BGEEmbeddings(
+                    model_name=EMBEDDING_MODEL_NAME,
+                    model_kwargs=model_kwargs,
+                    encode_kwargs={"batch_size": self.embed_batch_size, "normalize_embeddings": True}
+                )
+            except Exception:
+                print("Warning: HuggingFaceEmbeddings (bge-m3) not available. Using fake embeddings.")
+                from langchain_community.embeddings import DeterministicFakeEmbedding
+                self.embeddings = DeterministicFakeEmbedding(size=1024)
             
         self.vector_store = Chroma(
             persist_directory=self.persist_directory,
@@ -77,44 +389,353 @@ class RAGStorage:
             embedding_function=self.embeddings,
             collection_name="summaries_collection"
         )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            add_start_index=True,
-        )
+        tokenizer = getattr(self.embeddings, "tokenizer", None) or getattr(getattr(self.embeddings, "client", None), "tokenizer", None)
+        self.text_splitter = build_text_splitter(tokenizer)
+        # What worker processes need to rebuild text_splitter (see init_worker_text_splitter)
+        self.splitter_tokenizer = None
+        if tokenizer is not None:
+            self.splitter_tokenizer = getattr(tokenizer, "name_or_path", None) or EMBEDDING_MODEL_NAME
+        self._tok = tokenizer # Reused by _slice_to_tokens for prompt budgets
 
-    def is_book_indexed(self, book_id: str) -> bool:
-        """Checks if a book with the given book_id is already indexed."""
-        # Querying with a specific book_id and limit 1 to check existence
-        # The query text can be anything, as we are filtering by book_id
-        # We need to explicitly load the collection first
+        # book_ids known to be indexed, mirrored to indexed_books.json so later runs
+        # skip the metadata scan; loaded here so every successful write is recorded
+        self.indexed_books_path = os.path.join(self.persist_directory, "indexed_books.json")
+        self._indexed_cache = None
+        self._indexed_dirty = False
+        self._load_indexed_books()
+
+        # Background writer: vector store upserts run off the caller's thread;
+        # failed batches are kept as (book_id, exception) until flush() raises them
+        self._writer_queue = queue.Queue(maxsize=4)
+        self._write_errors = []
+        self._pending_batches = {} # book_id -> batches queued but not yet written
+        self._failed_books = set() # books with pending batches of which one already failed
+        self._book_results = {} # book_id -> True if all its batches landed, until wait_for_book reads it
+        self._write_lock = threading.Lock()
+        self._book_done = threading.Condition(self._write_lock) # notified when a book's last batch is written
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+        atexit.register(self._close_at_exit)
+
+    def _writer_loop(self):
+        """Pops queued (book_id, ids, embeddings, documents, metadatas) batches and upserts them; None stops it."""
+        while True:
+            item = self._writer_queue.get()
+            if item is None:
+                self._writer_queue.task_done()
+                return
+            book_id, ids, embeddings, documents, metadatas = item
+            try:
+                self.vector_store._collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=documents,
+                    metadatas=metadatas
+                )
+            except Exception as e:
+                print(f"[ERROR] Background write to vector store failed for '{book_id}': {e}")
+                with self._write_lock:
+                    self._write_errors.append((book_id, e))
+                    self._failed_books.add(book_id)
+            finally:
+                with self._write_lock:
+                    self._pending_batches[book_id] -= 1
+                    if not self._pending_batches[book_id]:
+                        del self._pending_batches[book_id]
+                        # Only a book whose batches all landed counts as indexed
+                        ok = book_id not in self._failed_books
+                        self._failed_books.discard(book_id)
+                        self._book_results[book_id] = ok
+                        if ok:
+                            self._mark_indexed(book_id)
+                        self._book_done.notify_all()
+                self._writer_queue.task_done()
+
+    def flush(self):
+        """
+        Blocks until all queued vector store writes are persisted and saves the graph if it changed.
+        Raises RuntimeError if a background write failed since the last flush.
+        """
+        self._writer_queue.join()
+        with self._write_lock:
+            errors, self._write_errors = self._write_errors, []
+        self.save_indexed_books()
+        self.save_graph()
+        if errors:
+            failed = ", ".join(sorted({book_id for book_id, _ in errors}))
+            raise RuntimeError(f"Vector store write failed for {failed}: {errors[0][1]}") from errors[0][1]
+
+    def close(self):
+        """Flushes pending writes and stops the writer thread; the instance can't add books afterwards."""
+        atexit.unregister(self._close_at_exit)
+        key = os.path.realpath(self.persist_directory)
+        if _STORAGE_CACHE.get(key) is self:
+            del _STORAGE_CACHE[key]
         try:
-            # Check vector store
-            collection = self.vector_store.get_or_create_collection(self.vector_store._collection_name)
-            results = collection.get(
-                where={"book_id": book_id},
-                limit=1
+            self.flush()
+        finally:
+            if self._writer_thread.is_alive():
+                self._writer_queue.put(None)
+                self._writer_thread.join()
+
+    def _close_at_exit(self):
+        """atexit hook: a failed write is logged, not raised as a traceback during shutdown."""
+        try:
+            self.close()
+        except Exception as e:
+            print(f"[ERROR] {e}")
+
+    def wait_for_book(self, book_id: str) -> bool:
+        """Blocks until the queued batches of book_id are written; False if any of them failed."""
+        with self._book_done:
+            self._book_done.wait_for(lambda: book_id not in self._pending_batches)
+            return self._book_results.pop(book_id, True)
+
+    def save_indexed_books(self):
+        """Atomically rewrites indexed_books.json if the indexed set changed."""
+        # Snapshot under the lock the writer thread marks books with; the file is written outside it
+        with self._write_lock:
+            if not self._indexed_dirty or self._indexed_cache is None:
+                return
+            book_ids = sorted(self._indexed_cache)
+            self._indexed_dirty = False
+        try:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.persist_directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(book_ids, f)
+            os.replace(tmp_path, self.indexed_books_path)
+        except Exception as e:
+            with self._write_lock:
+                self._indexed_dirty = True # Retried by the next flush()
+            print(f"[ERROR] Failed to save indexed books list: {e}")
+
+    def _load_indexed_books(self):
+        """
+        Fills _indexed_cache from indexed_books.json, or with one vector store metadata scan
+        when there is none yet; leaves it None if both fail. Caller holds _write_lock once
+        the writer thread runs.
+        """
+        if os.path.exists(self.indexed_books_path):
+            try:
+                with open(self.indexed_books_path, "r", encoding="utf-8") as f:
+                    self._indexed_cache = set(json.load(f))
+                return
+            except Exception as e:
+                print(f"[WARNING] Could not read {self.indexed_books_path}: {e}. Rebuilding from vector store.")
+        try:
+            results = self.vector_store._collection.get(
+                where={"book_id": {"$ne": ""}},
+                include=["metadatas"]
             )
-            return len(results['ids']) > 0
+            self._indexed_cache = {meta["book_id"] for meta in results["metadatas"] if meta and meta.get("book_id")}
+            self._indexed_dirty = True # Written to indexed_books.json by the next flush()
         except Exception as e:
-            print(f"[WARNING] Could not check if book '{book_id}' is indexed: {e}")
-            return False
+            print(f"[WARNING] Could not list indexed books: {e}")
+
+    def _mark_indexed(self, book_id: str):
+        """Adds book_id to the indexed set (caller holds _write_lock); flush() rewrites indexed_books.json."""
+        if self._indexed_cache is None:
+            self._load_indexed_books()
+        if self._indexed_cache is not None:
+            self._indexed_cache.add(book_id)
+            self._indexed_dirty = True
+
+    def is_book_indexed(self, book_id: str) -> bool:
+        """Checks if a book with the given book_id is already indexed."""
+        with self._write_lock:
+            if self._indexed_cache is None:
+                self._load_indexed_books()
+            return self._indexed_cache is not None and book_id in self._indexed_cache
+
+    @staticmethod
+    def _chunk_id(chunk: Document) -> str:
+        """Content-hash id so re-ingesting the same chunk upserts instead of duplicating."""
+        key = f"{chunk.metadata.get('book_id', '')}\0{chunk.page_content}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _embed_sorted(self, chunks: List[Document]) -> List[List[float]]:
+        """
+        Embeds chunks in length-contiguous batches (smart batching) to minimize padding.
+        Returns embeddings aligned with the original chunk order.
+        """
+        if not chunks:
+            return []
+
+        # Sort by length so each batch pads to a similar length,
+        # then invert the permutation to re-align with the original order.
+        order = np.argsort([-len(c.page_content) for c in chunks], kind="stable")
+        embeddings = [None] * len(chunks)
+        batch_size = self.embed_batch_size
+        starts = range(0, len(order), batch_size)
+        if tqdm is not None:
+            starts = tqdm(starts, desc="Embedding chunks", unit="batch")
+        for start in starts:
+            batch_idx = order[start:start + batch_size]
+            batch_embeddings = self.embeddings.embed_documents([chunks[i].page_content for i in batch_idx])
+            for idx, emb in zip(batch_idx, batch_embeddings):
+                embeddings[idx] = emb
+        return embeddings
+
+    def _add_chunks(self, chunks: List[Document], book_id: str):
+        """Embeds chunks and queues them for the background vector store writer."""
+        if not chunks:
+            return
+
+        # Drop repeated chunks and those already stored from an earlier run,
+        # so only novel content is embedded
+        unique = {}
+        for chunk in chunks:
+            unique.setdefault(self._chunk_id(chunk), chunk)
+        try:
+            existing = set(self.vector_store._collection.get(ids=list(unique), include=[])["ids"])
+        except Exception:
+            existing = set()
+        ids = [chunk_id for chunk_id in unique if chunk_id not in existing]
+        chunks = [unique[chunk_id] for chunk_id in ids]
+        if not chunks:
+            # Everything is already stored from an earlier run
+            with self._write_lock:
+                if book_id not in self._pending_batches:
+                    self._mark_indexed(book_id)
+            return
+
+        embeddings = self._embed_sorted(chunks)
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+
+        # Write in fixed-size batches rather than one giant upsert per book;
+        # the writer marks the book indexed once all of them have landed
+        batch_size = self.embed_batch_size
+        starts = range(0, len(chunks), batch_size)
+        with self._write_lock:
+            self._pending_batches[book_id] = self._pending_batches.get(book_id, 0) + len(starts)
+        for i in starts:
+            self._writer_queue.put((
+                book_id,
+                ids[i:i + batch_size],
+                embeddings[i:i + batch_size],
+                texts[i:i + batch_size],
+                metadatas[i:i + batch_size]
+            ))
+
+    def _index_node(self, node: str):
+        """Registers a graph node under each of its lowercased name tokens."""
+        for token in _WORD_RE.findall(str(node).lower()):
+            self._node_index.setdefault(token, []).append(node)
 
     def save_graph(self):
-        """Saves the NetworkX graph to disk."""
+        """Saves the NetworkX graph to disk if it changed since the last save."""
+        if not self._graph_dirty:
+            return
         if self.graph and nx:
             try:
                 os.makedirs(self.persist_directory, exist_ok=True)
-                nx.write_gml(self.graph, self.graph_path)
+                with open(self.graph_path, "wb") as f:
+                    pickle.dump(self.graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self._graph_dirty = False
                 print(f"[INFO] Knowledge Graph saved to {self.graph_path}")
             except Exception as e:
                 print(f"[ERROR] Failed to save graph: {e}")
+        self._materialize_igraph()
+
+    def _materialize_igraph(self):
+        """Builds the igraph query copy of the NetworkX graph (ingest keeps mutating NetworkX)."""
+        self._ig = None
+        self._ig_vid = {}
+        if ig is None or not self.graph:
+            return
+        try:
+            self._ig = ig.Graph.from_networkx(self.graph, vertex_attr_hashable="name")
+            self._ig_vid = {name: vid for vid, name in enumerate(self._ig.vs["name"])}
+        except Exception as e:
+            print(f"[WARNING] Could not build igraph view, using NetworkX for queries: {e}")
+            self._ig = None
+            self._ig_vid = {}
+
+    def _slice_to_tokens(self, text: str, max_tokens: int) -> str:
+        """Truncates text to at most max_tokens tokens (≈4 chars per token without a tokenizer)."""
+        if len(text) <= max_tokens:
+            return text
+        if self._tok is None:
+            return text[:max_tokens * 4]
+        try:
+            # Cut at the character offset of the last kept token; no decode round-trip
+            offsets = self._tok(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        except Exception:
+            return text[:max_tokens * 4]
+        if len(offsets) <= max_tokens:
+            return text
+        return text[:offsets[max_tokens - 1][1]]
+
+    def _get_nlp(self):
+        """Lazily loads the spaCy NER pipeline. Returns None if spaCy or the model is unavailable."""
+        if self._nlp is None:
+            self._nlp = False
+            if spacy is not None:
+                try:
+                    self._nlp = spacy.load("en_core_web_sm", disable=["lemmatizer"])
+                except OSError as e:
+                    print(f"[WARNING] spaCy model 'en_core_web_sm' not available ({e}). Using LLM for graph extraction.")
+        return self._nlp or None
+
+    def _uses_llm_ner(self) -> bool:
+        """True when graph extraction should go through the LLM rather than spaCy."""
+        return self.use_llm_ner or self._get_nlp() is None
+
+    def _extract_graph_elements_spacy(self, text: str) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Uses local spaCy NER to extract entities, and subject-verb-object
+        dependency triples between them as relationships. Returns (nodes, edges).
+        """
+        doc = self._get_nlp()(text[:100000])
+
+        entities = {}
+        entity_by_token = {}
+        for ent in doc.ents:
+            entity_type = SPACY_ENTITY_TYPES.get(ent.label_)
+            if not entity_type:
+                continue
+            name = ent.text.strip()
+            entities.setdefault(name, {"name": name, "type": entity_type, "description": ent.sent.text.strip()[:200]})
+            for token in ent:
+                entity_by_token[token.i] = name
+
+        relationships = []
+        for token in doc:
+            source = entity_by_token.get(token.i)
+            if not source or token.dep_ not in ("nsubj", "nsubjpass") or token.head.pos_ not in ("VERB", "AUX"):
+                continue
+            verb = token.head
+            objects = [(child, verb.text.lower()) for child in verb.children if child.dep_ in ("dobj", "attr", "dative", "oprd")]
+            for prep in verb.children:
+                if prep.dep_ == "prep":
+                    objects.extend((child, f"{verb.text.lower()} {prep.text.lower()}") for child in prep.children if child.dep_ == "pobj")
+            for obj, relation in objects:
+                target = entity_by_token.get(obj.i)
+                if target and target != source:
+                    relationships.append({
+                        "source": source,
+                        "target": target,
+                        "relation": relation,
+                        "description": verb.sent.text.strip()[:200]
+                    })
+
+        return list(entities.values()), relationships
 
     def _extract_graph_elements(self, text: str) -> Tuple[List[Dict], List[Dict]]:
         """
-        Uses LLM to extract entities and relationships from text.
+        Extracts entities and relationships from text, with local spaCy NER
+        unless use_llm_ner is set (or spaCy is unavailable), otherwise with the LLM.
         Returns (nodes, edges).
         """
+        if not self._uses_llm_ner():
+            try:
+                return self._extract_graph_elements_spacy(text)
+            except Exception as e:
+                print(f"[DEBUG] Graph extraction failed: {e}")
+                return [], []
+
         if not self.llm:
             return [], []
 
@@ -122,14 +743,14 @@ class RAGStorage:
             "Extract the main Entities (Characters, Locations, Organizations, Key Objects) and Relationships from the following text.\n"
             "Return JSON format with 'entities' (name, type, description) and 'relationships' (source, target, relation, description).\n"
             "Keep descriptions concise.\n\n"
-            f"Text: {text[:4000]}\n\n" # Limit text context
+            f"Text: {self._slice_to_tokens(text, GRAPH_PROMPT_TOKENS)}\n\n" # Limit text context
             "JSON Output:"
         )
         
         try:
             response = self.llm.call(prompt)
             # Basic cleanup to find JSON in response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
+            json_match = _JSON_BLOB_RE.search(response)
             if json_match:
                 data = json.loads(json_match.group(0))
                 return data.get("entities", []), data.get("relationships", [])
@@ -142,16 +763,22 @@ class RAGStorage:
 
     def update_graph_from_text(self, text: str, source_id: str):
         """Updates the graph with entities from a text segment."""
-        if not self.graph:
+        if self.graph is None:
             return
 
         entities, relationships = self._extract_graph_elements(text)
-        
+        self._apply_graph_elements(entities, relationships)
+
+    def _apply_graph_elements(self, entities: List[Dict], relationships: List[Dict]):
+        """Merges extracted entities and relationships into the graph (not thread-safe)."""
         for entity in entities:
             name = entity.get("name")
             if name:
                 if not self.graph.has_node(name):
                     self.graph.add_node(name, type=entity.get("type", "Unknown"), description=entity.get("description", ""))
+                    self._index_node(name)
+                    self._graph_dirty = True
+                    self._ig = None
                 else:
                     # Merge description if needed
                     pass
@@ -163,9 +790,14 @@ class RAGStorage:
             if source and target and relation:
                 if self.graph.has_node(source) and self.graph.has_node(target):
                     self.graph.add_edge(source, target, relation=relation, description=rel.get("description", ""))
+                    self._graph_dirty = True
+                    self._ig = None
 
-    def add_book(self, file_path: str, book_id: str):
-        """Indexes a book into the vector store and generates hierarchical summaries."""
+    def add_book(self, file_path: str, book_id: str, wait: bool = True):
+        """
+        Indexes a book into the vector store and generates hierarchical summaries.
+        With wait=False it returns once the chunks are queued; write failures then surface from flush().
+        """
         if not os.path.exists(file_path):
             print(f"File not found: {file_path}")
             return False
@@ -176,49 +808,33 @@ class RAGStorage:
 
         print(f"Indexing book: {book_id} from {file_path}...")
         
-        ext = os.path.splitext(file_path)[1].lower()
-        documents = []
-        
         try:
-            if ext == ".pdf":
-                loader = PyPDFLoader(file_path)
-                documents = loader.load()
-            elif ext == ".epub":
-                loader = UnstructuredEPubLoader(file_path)
-                documents = loader.load()
-            else:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    text = f.read()
-                    documents = [Document(page_content=text, metadata={"source": file_path})]
+            chunks, full_text = self._parse_and_split(file_path, book_id)
         except Exception as e:
             print(f"Error loading document: {e}")
             return False
 
-        # Add metadata and token counts
-        full_text = ""
-        for i, doc in enumerate(documents):
-            doc.metadata["book_id"] = book_id
-            doc.metadata["type"] = "chunk"
-            doc.metadata["chunk_index"] = i
-            full_text += doc.page_content + " "
+        self._embed_and_summarize(chunks, full_text, book_id, file_path)
 
-        chunks = self.text_splitter.split_documents(documents)
-        # Enrich chunks with character positions
-        current_pos = 0
-        for chunk in chunks:
-            chunk.metadata["start_char"] = current_pos
-            chunk.metadata["end_char"] = current_pos + len(chunk.page_content)
-            current_pos += len(chunk.page_content)
+        # Wait for this book's batches only (not the whole queue) so a failed write is reported here
+        if wait and not self.wait_for_book(book_id):
+            print(f"[ERROR] Book '{book_id}' could not be written to the vector store.")
+            return False
+        return True
 
-        self.vector_store.add_documents(chunks)
+    def _parse_and_split(self, file_path: str, book_id: str) -> Tuple[List[Document], str]:
+        """Loads and splits a book with this storage's text splitter. Returns (chunks, full_text)."""
+        return parse_and_split(file_path, book_id, self.text_splitter)
+
+    def _embed_and_summarize(self, chunks: List[Document], full_text: str, book_id: str, file_path: str):
+        """Embeds pre-split chunks into the vector store and generates hierarchical summaries."""
+        self._add_chunks(chunks, book_id)
         print(f"Successfully indexed {len(chunks)} chunks from {book_id}.")
 
         # --- GraphRAG & Summarization Step ---
         # We perform this AFTER vector indexing to ensure basic search works first.
         if len(full_text) > 5000:
             self.generate_hierarchical_summaries(full_text, book_id, file_path)
-        
-        return True
 
     def generate_hierarchical_summaries(self, text: str, book_id: str, source_path: str):
         """Generates section-level summaries and updates the Knowledge Graph."""
@@ -236,38 +852,53 @@ class RAGStorage:
         if len(sections) > 20:
             sections = sections[:20] 
 
+        def summarize(section):
+            prompt = f"Summarize this section of the book (approx. 300 words). Focus on key plot points, character development, and themes:\n\n{self._slice_to_tokens(section, SECTION_PROMPT_TOKENS)}" # Limit context
+            return self.llm.call(prompt)
+
+        # 1. Summarize all sections concurrently; futures keep section order
+        with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+            futures = [executor.submit(summarize, section) for section in sections]
+
         section_summaries = []
-        for i, section in enumerate(sections):
-            prompt = f"Summarize this section of the book (approx. 300 words). Focus on key plot points, character development, and themes:\n\n{section[:15000]}" # Limit context
+        for i, future in enumerate(futures):
             try:
-                summary = self.llm.call(prompt) 
-                
-                # 1. Add to Summary Store
-                summary_doc = Document(
-                    page_content=summary,
-                    metadata={
-                        "book_id": book_id,
-                        "type": "chapter_summary",
-                        "section_index": i,
-                        "source": source_path
-                    }
-                )
-                section_summaries.append(summary_doc)
-                
-                # 2. Update Graph from this summary (Much faster than processing raw text)
-                if self.graph:
-                    print(f"  [Graph] Extracting entities from section {i+1}/{len(sections)} summary...")
-                    self.update_graph_from_text(summary, f"{book_id}_section_{i}")
-                    
+                summary = future.result()
             except Exception as e:
                 print(f"Error processing section {i}: {e}")
+                continue
+
+            section_summaries.append(Document(
+                page_content=summary,
+                metadata={
+                    "book_id": book_id,
+                    "type": "chapter_summary",
+                    "section_index": i,
+                    "source": source_path
+                }
+            ))
+
+        # 2. Extract graph elements from the summaries (Much faster than processing raw text),
+        # then mutate the graph serially since nx.Graph is not thread-safe
+        if self.graph is not None and section_summaries:
+            print(f"  [Graph] Extracting entities from {len(section_summaries)} section summaries...")
+            summary_texts = [s.page_content for s in section_summaries]
+            if self._uses_llm_ner():
+                # LLM calls are I/O-bound: issue them concurrently
+                with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+                    extracted = list(executor.map(self._extract_graph_elements, summary_texts))
+            else:
+                # Local spaCy pass is CPU-bound and cheap: run serially
+                extracted = [self._extract_graph_elements(text) for text in summary_texts]
+            for entities, relationships in extracted:
+                self._apply_graph_elements(entities, relationships)
 
         if section_summaries:
             self.summary_store.add_documents(section_summaries)
             
             # Master summary
             combined_summaries = "\n\n".join([s.page_content for s in section_summaries])
-            master_prompt = f"Generate a comprehensive book summary (1-2 pages) based on these section summaries. Include main character arcs and themes:\n\n{combined_summaries[:20000]}"
+            master_prompt = f"Generate a comprehensive book summary (1-2 pages) based on these section summaries. Include main character arcs and themes:\n\n{self._slice_to_tokens(combined_summaries, MASTER_PROMPT_TOKENS)}"
             try:
                 master_summary = self.llm.call(master_prompt)
                 master_doc = Document(
@@ -281,9 +912,6 @@ class RAGStorage:
                 self.summary_store.add_documents([master_doc])
             except Exception as e:
                 print(f"Error generating master summary: {e}")
-        
-        # Save graph after processing all sections
-        self.save_graph()
 
     def query(self, query_text: str, book_id: Optional[str] = None, k: int = 5, query_type: str = "SPECIFIC") -> List[Document]:
         """Queries the vector store with adaptive retrieval and re-ranking."""
@@ -303,15 +931,17 @@ class RAGStorage:
             
         # 1. Extract potential entities from query (simple heuristic or LLM)
         # Simple heuristic: Capitalized words (not perfect but fast)
-        potential_entities = re.findall(r'\b[A-Z][a-z]+\b', query_text)
+        # (deduplicated so repeated names are looked up once)
+        potential_entities = list(dict.fromkeys(_CAP_WORD_RE.findall(query_text)))
         
-        found_nodes = []
-        for entity in potential_entities:
-            # Case-insensitive search in graph nodes
-            for node in self.graph.nodes():
-                if entity.lower() in node.lower():
-                    found_nodes.append(node)
+        # Case-insensitive token lookup in the prebuilt node index
+        found_nodes = list(dict.fromkeys(
+            node for entity in potential_entities for node in self._node_index.get(entity.lower(), ())
+        ))
         
+        if self._ig is not None:
+            return self._query_igraph(found_nodes)
+
         graph_context = []
         for node in found_nodes[:5]: # Limit to top 5 matching nodes
             # Get neighbors
@@ -334,6 +964,36 @@ class RAGStorage:
             
         return graph_context
 
+    def _query_igraph(self, found_nodes: List[str]) -> List[Document]:
+        """_query_graph over the igraph copy (C-level neighbor and edge lookups)."""
+        g = self._ig
+        types = g.vs["type"] if "type" in g.vs.attributes() else None
+        descriptions = g.vs["description"] if "description" in g.vs.attributes() else None
+        relations = g.es["relation"] if "relation" in g.es.attributes() else None
+
+        graph_context = []
+        for node in found_nodes[:5]: # Limit to top 5 matching nodes
+            vid = self._ig_vid.get(node)
+            if vid is None:
+                continue
+
+            desc = f"Entity: {node} ({(types[vid] if types else None) or 'Unknown'})\n"
+            desc += f"Description: {(descriptions[vid] if descriptions else None) or ''}\n"
+            desc += "Relationships:\n"
+
+            for eid in g.incident(vid)[:5]: # Limit neighbors
+                edge = g.es[eid]
+                neighbor = edge.target if edge.source == vid else edge.source
+                rel_type = (relations[eid] if relations else None) or 'related to'
+                desc += f"  - {rel_type} -> {g.vs[neighbor]['name']}\n"
+
+            graph_context.append(Document(
+                page_content=desc,
+                metadata={"type": "graph_context", "entity": node}
+            ))
+
+        return graph_context
+
     def _query_mixed(self, query_text: str, book_id: str, filter_dict: dict, use_graph: bool = True) -> List[Document]:
         """Combines summaries, graph context, and specific relevant chunks."""
         results = []
@@ -344,18 +1004,21 @@ class RAGStorage:
             results.extend(graph_docs)
             print(f"[DEBUG] Retrieved {len(graph_docs)} graph context documents")
         
+        # Embed the query once and reuse it for all three store lookups
+        query_embedding = self.embeddings.embed_query(query_text)
+        
         # 2. Broad Summaries
         summary_filter = {"book_id": book_id, "type": "book_summary"} if book_id else {"type": "book_summary"}
-        summaries = self.summary_store.similarity_search(query_text, k=1, filter=summary_filter)
+        summaries = self.summary_store.similarity_search_by_vector(query_embedding, k=1, filter=summary_filter)
         results.extend(summaries)
         
         # 3. Chapter Summaries (Mid-level)
         chapter_filter = {"book_id": book_id, "type": "chapter_summary"} if book_id else {"type": "chapter_summary"}
-        chapter_summaries = self.summary_store.similarity_search(query_text, k=3, filter=chapter_filter)
+        chapter_summaries = self.summary_store.similarity_search_by_vector(query_embedding, k=3, filter=chapter_filter)
         results.extend(chapter_summaries)
         
         # 4. Specific Chunks (Low-level)
-        specific = self.vector_store.similarity_search(query_text, k=10, filter=filter_dict)
+        specific = self.vector_store.similarity_search_by_vector(query_embedding, k=10, filter=filter_dict)
         results.extend(specific)
         
         return self.rerank_for_relevance(results, query_text, k=15)
@@ -365,38 +1028,57 @@ class RAGStorage:
         if not chunks:
             return []
             
-        # Sort by temporal order (start_char)
-        sorted_chunks = sorted(chunks, key=lambda x: x.metadata.get("start_char", 0))
+        # Temporal order (start_char) as a numpy array
+        starts = np.fromiter((c.metadata.get("start_char", 0) for c in chunks), dtype=np.int64, count=len(chunks))
         
-        if len(sorted_chunks) <= n:
-            return sorted_chunks
+        if len(chunks) <= n:
+            return [chunks[i] for i in np.argsort(starts, kind="stable")]
             
-        # Divide into thirds
-        m1 = len(sorted_chunks) // 3
-        m2 = 2 * len(sorted_chunks) // 3
+        # Divide into thirds with an O(N) partition instead of a full sort
+        m1 = len(chunks) // 3
+        m2 = 2 * len(chunks) // 3
+        part = np.argpartition(starts, [m1, m2])
         
-        s1 = sorted_chunks[:m1]
-        s2 = sorted_chunks[m1:m2]
-        s3 = sorted_chunks[m2:]
+        def earliest(segment, k):
+            # The k earliest chunks of a segment, in temporal order
+            if k <= 0:
+                return segment[:0]
+            if k < len(segment):
+                segment = segment[np.argpartition(starts[segment], k - 1)[:k]]
+            return segment[np.argsort(starts[segment], kind="stable")]
         
         # Sample proportionally
         k_each = n // 3
-        sample = s1[:k_each] + s2[:k_each] + s3[:k_each + (n % 3)]
-        return sample
+        selected = np.concatenate([
+            earliest(part[:m1], k_each),
+            earliest(part[m1:m2], k_each),
+            earliest(part[m2:], k_each + (n % 3)),
+        ])
+        return [chunks[i] for i in selected]
 
     def rerank_for_relevance(self, chunks: List[Document], query: str, k: int) -> List[Document]:
         """Removes near-duplicates and returns top k."""
         if not chunks:
             return []
             
-        seen_content = set()
+        seen_fingerprints = set()
+        seen_short = set() # Texts too short to fingerprint, compared exactly
         unique_chunks = []
         
         for doc in chunks:
-            content = doc.page_content.strip()[:200] # Use prefix for diversity check
-            if content not in seen_content:
-                unique_chunks.append(doc)
-                seen_content.add(content)
+            fp = _simhash(doc.page_content)
+            if fp is None:
+                text = doc.page_content.strip()
+                if text in seen_short:
+                    continue
+                seen_short.add(text)
+            elif fp in seen_fingerprints or any(bin(fp ^ prev).count("1") <= NEAR_DUP_MAX_DISTANCE for prev in seen_fingerprints):
+                continue
+            else:
+                seen_fingerprints.add(fp)
+            unique_chunks.append(doc)
+            if len(unique_chunks) >= k:
+                break
         
         return unique_chunks[:k]
 
@@ -9,11 +9,13 @@ sys.path.append(project_root)
 
 load_dotenv(os.path.join(project_root, ".env"))
 
+from concurrent.futures import ProcessPoolExecutor
+
 try:
-    from script.rag_storage import RAGStorage
+    from script.rag_storage import RAGStorage, parse_and_split, init_worker_text_splitter
     from script.annas_config import project_root
 except ImportError:
-    from rag_storage import RAGStorage
+    from rag_storage import RAGStorage, parse_and_split, init_worker_text_splitter
     from annas_config import project_root
 
 def reindex_crew(crew_name):
@@ -29,30 +31,61 @@ def reindex_crew(crew_name):
     print(f"Target RAG DB: {rag_db_path}")
     
     # Initialize Storage with new BGE-M3 model
-    storage = RAGStorage(persist_directory=rag_db_path)
+    storage = RAGStorage.get(rag_db_path)
     
     files_found = False
+    books = []
     for file in os.listdir(input_dir):
         if file.lower().endswith(('.pdf', '.epub', '.txt')):
             files_found = True
             file_path = os.path.join(input_dir, file)
             book_id = os.path.splitext(file)[0].replace("_", " ")
             
-            print(f"
-[+] Found file: {file}")
+            print(f"\n[+] Found file: {file}")
             print(f"[+] Indexing as: {book_id}")
             
-            success = storage.add_book(file_path, book_id)
-            if success:
-                print(f"[OK] Successfully indexed {book_id}")
-            else:
+            if storage.is_book_indexed(book_id):
+                print(f"[OK] {book_id} is already indexed. Skipping.")
+                continue
+            books.append((file_path, book_id))
+
+    # Parse + split PDFs in parallel worker processes (CPU-bound, pure Python);
+    # embedding and LLM summarization stay serialized in this process.
+    # Workers split with the storage's own splitter so chunk ids match add_book's.
+    max_workers = max(1, (os.cpu_count() or 2) // 2)
+    queued = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker_text_splitter,
+                             initargs=(storage.splitter_tokenizer,)) as executor:
+        futures = [(file_path, book_id, executor.submit(parse_and_split, file_path, book_id)) for file_path, book_id in books]
+        
+        for file_path, book_id, future in futures:
+            try:
+                chunks, full_text = future.result()
+            except Exception as e:
+                print(f"Error loading document: {e}")
                 print(f"[FAIL] Could not index {book_id}")
+                continue
+            
+            storage._embed_and_summarize(chunks, full_text, book_id, file_path)
+            queued.append(book_id)
+
+    # Report each book once its vector store writes have completed
+    for book_id in queued:
+        if storage.wait_for_book(book_id):
+            print(f"[OK] Successfully indexed {book_id}")
+        else:
+            print(f"[FAIL] Could not write {book_id} to the vector store")
+
+    # Save the indexed list and the graph once for all books
+    try:
+        storage.flush()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
 
     if not files_found:
         print(f"[!] No valid files found in {input_dir}")
     else:
-        print(f"
---- Done! You can now use ask_rag.py ---")
+        print(f"\n--- Done! You can now use ask_rag.py ---")
 
 if __name__ == "__main__":
     import argparse
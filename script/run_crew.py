@@ -3,7 +3,9 @@ import os
 import sys
 import warnings
 import logging
+import mmap
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional # Import Optional
 
 # Suppress Pydantic V2 compatibility warnings
@@ -15,16 +17,17 @@ os.environ["OTEL_SDK_DISABLED"] = "true"
 os.environ["LITELLM_LOGGING"] = "false"
 
 # Fix Windows console encoding for emojis
+# (reconfigure in place: keeps the existing streams and their line buffering)
 if sys.platform == "win32":
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 
-from crewai import Agent, Task, Crew, Process, LLM
-from dotenv import load_dotenv
-
-# Import tools registry
-from tools_registry import get_tool_agent_tools
+# crewai (and tools_registry, which imports it) are loaded on first use by
+# _ensure_crewai, so --help and Crew.md validation errors don't pay for them
+Agent = Task = Crew = Process = LLM = None
+get_tool_agent_tools = None
+# Model name -> LLM, filled by _get_llm as agents request models
+_llm_cache = {}
 
 # Path configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -32,6 +35,206 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 INPUT_DIR = os.path.join(PROJECT_ROOT, "input")
 # Default to None, will be set relative to crew file if not provided
 OUTPUT_DIR = None 
+# Output directories already created by run_crew in this process
+_OUTPUT_READY = set()
+
+# Precompiled Crew.md patterns (parse_crew_md runs them for every crew/block)
+# Field lines: "- **Key**: value" (most common), with "- Key: value" as fallback
+_FIELD_LINE_BOLD_RE = re.compile(r"^\s*-\s*\*\*(?P<key>[^:]+?)\*\*\s*:(?P<value>.*)$")
+_FIELD_LINE_PLAIN_RE = re.compile(r"^\s*-\s*(?P<key>[^:]+?)\s*:(?P<value>.*)$")
+# Lines that end the current field without starting a new one
+_SUBHEADER_STOP_RE = re.compile(r"^\s*###")
+_SECTION_STOP_RE = re.compile(r"^\s*##[^#]")
+_CONFIG_BOLD_STOP_RE = re.compile(r"^\s*(?:-\s*[^:]+?:|##[^#])")
+# (field line, stop line) pairs tried in order by parse_markdown_fields; the first that yields fields wins
+_CONFIG_FIELD_PATTERNS = ((_FIELD_LINE_BOLD_RE, _CONFIG_BOLD_STOP_RE), (_FIELD_LINE_PLAIN_RE, _SECTION_STOP_RE))
+_AGENT_FIELD_PATTERNS = ((_FIELD_LINE_BOLD_RE, _SUBHEADER_STOP_RE), (_FIELD_LINE_PLAIN_RE, _SUBHEADER_STOP_RE))
+_TITLE_RE = re.compile(r'^# Crew Team:(.*)', re.MULTILINE)
+# Crew.md sections as (name, marker that ends it); see _split_sections
+_SECTIONS = (("Configuration", "## Agents"), ("Agents", "## Tasks"), ("Tasks", None))
+_OUTPUT_FILE_RE = re.compile(r'\[Output:\s*(.*?)\]')
+_OUTPUT_TAG_RE = re.compile(r'\[Output:.*?\]')
+# Brackets are excluded from names so a stray "[[" can't run on to a later "]]"
+_FILE_PLACEHOLDER_RE = re.compile(r'\[\[([^\[\]]+?)\]\]')
+
+# Keyword routing of task outputs: one anchored match, lookaheads keep the plan > result > feedback priority
+_ROUTE_RE = re.compile(
+    r'^(?:(?=.*(?:plan|strategy|analysis|guide|outline))(?P<plan>)'
+    r'|(?=.*(?:result|execute|enrich|develop|write|creation))(?P<result>)'
+    r'|(?=.*(?:feedback|evaluation|review|edit))(?P<feedback>))',
+    re.DOTALL
+)
+_ROUTE_TARGETS = {"plan": "Task_Plan.md", "result": "Task_Result.md", "feedback": "Task_Feedback.md"}
+
+# Task name keywords marking the main production task (receives style guide and feedback)
+_PRODUCTION_RE = re.compile(r'enrich|develop|write')
+
+# Above this size, _read_text decodes files straight from a memory map
+_MMAP_THRESHOLD = 1 << 20
+
+def _read_text(path):
+    """Reads a UTF-8 text file with universal newlines; returns None if it doesn't exist."""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size <= _MMAP_THRESHOLD:
+                text = f.read().decode('utf-8')
+            else:
+                # Decode from the mapping, so no private bytes copy of the file is made
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    text = str(mm, 'utf-8')
+    except FileNotFoundError:
+        return None
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def _write_atomic(path, text):
+    """
+    Writes text to path via a synced temp file and os.replace, so readers (and a crash)
+    never leave a partial file. Permissions match what open(path, 'w') would give.
+    """
+    # Created 0666 like open() does, so the kernel applies the umask; unlike mkstemp's 0600
+    tmp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            # An existing file keeps its mode, as it would when truncated by open()
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+# Injected [[files]] larger than this are sampled (head/middle/tail windows of _SAMPLE_CHUNK)
+_SAMPLE_THRESHOLD = 50000
+_SAMPLE_CHUNK = 15000
+
+def _read_injected_file(path, f_name):
+    """Reads a [[file]] for injection; large files are sampled with seeks instead of read whole."""
+    size = os.path.getsize(path)
+    if size <= _SAMPLE_THRESHOLD:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    print(f"Sampling large file: {f_name}")
+    chunk = _SAMPLE_CHUNK
+    windows = []
+    with open(path, 'rb') as f:
+        for offset in (0, max(0, size // 2 - chunk // 2), max(0, size - chunk)):
+            f.seek(offset)
+            # Windows may cut a multi-byte character at either edge
+            windows.append(f.read(chunk).decode('utf-8', errors='ignore').replace('\r\n', '\n'))
+    return _sample_large(f_name, size, *windows)
+
+def _sample_large(f_name, size, head, middle, tail):
+    """Assembles the sampled view of a large file with a single join."""
+    return "".join((
+        f"[WARNING: Content of {f_name} has been sampled due to its large size ({size} bytes). "
+        "Significant portions of the document have been omitted. "
+        "If the analysis requires specific sections not shown below, please request them individually.]\n\n",
+        "--- START OF FILE ---\n", head, "\n\n",
+        "--- MIDDLE OF FILE ---\n", middle, "\n\n",
+        "--- END OF FILE ---\n", tail,
+    ))
+
+def _split_sections(content):
+    """Locates the title and the Configuration/Agents/Tasks sections once, with plain str.find."""
+    title_match = _TITLE_RE.search(content)
+    sections = {"title": title_match.group(1).strip() if title_match else None}
+    for name, end_marker in _SECTIONS:
+        start = content.find(f"## {name}")
+        if start == -1:
+            continue
+        start += len(name) + 3
+        end = content.find(end_marker, start) if end_marker else -1
+        sections[name] = content[start:end] if end != -1 else content[start:]
+    return sections
+
+def _iter_blocks(section_text):
+    """Yields (header, body) for each '### ' block of a section, splitting on the headers."""
+    # Leading newline lets a header on the first line split like the others
+    for part in ('\n' + section_text).split('\n### ')[1:]:
+        header, _, body = part.partition('\n')
+        yield header, body
+
+def _placeholder_candidates(f_name, crew_input_dir):
+    """Paths to try for a [[filename]], in priority order."""
+    # 1. Crew's input/ folder
+    candidates = [os.path.join(crew_input_dir, f_name)]
+    # If f_name starts with 'input/', also try without 'input/' prefix for crew folder
+    if f_name.startswith("input/") or f_name.startswith("input\\"):
+        candidates.append(os.path.join(crew_input_dir, f_name[6:]))
+    # 2. Global input/ folder, 3. Project root
+    candidates.append(os.path.join(INPUT_DIR, f_name))
+    candidates.append(os.path.join(PROJECT_ROOT, f_name))
+    return candidates
+
+def _dir_entries(directory, dir_cache):
+    """Returns the (normcased) file names in directory, scanning it once per parse."""
+    entries = dir_cache.get(directory)
+    if entries is None:
+        try:
+            # scandir's cached entry type filters out sub-directories without a stat per name
+            with os.scandir(directory) as it:
+                entries = frozenset(os.path.normcase(entry.name) for entry in it if entry.is_file())
+        except OSError:
+            entries = frozenset()
+        dir_cache[directory] = entries
+    return entries
+
+def _read_first_candidate(paths, f_name, file_cache, dir_cache):
+    """
+    Returns (path, content) for the first readable path. A path is only opened when its name
+    appears in the scandir listing of its directory (_dir_entries), so misses cost no open.
+    """
+    for path in paths:
+        content = file_cache.get(path)
+        if content is not None:
+            return path, content
+        # One listdir per directory replaces a failed open per placeholder
+        if os.path.normcase(os.path.basename(path)) not in _dir_entries(os.path.dirname(path), dir_cache):
+            continue
+        # Different spellings of one file (input/x.md, ./x.md, symlinks) share a cache entry
+        real_path = os.path.realpath(path)
+        content = file_cache.get(real_path)
+        if content is None:
+            try:
+                content = _read_injected_file(path, f_name)
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                continue
+            file_cache[real_path] = content
+        file_cache[path] = content
+        return path, content
+    return None, None
+
+def _scan_fields(markdown_block, line_pattern, stop_pattern):
+    """Parses "- Key: value" fields in one pass over the lines; other lines continue the current value."""
+    fields = {}
+    key = None
+    value_lines = []
+    for line in markdown_block.splitlines():
+        match = line_pattern.match(line)
+        if match:
+            if key is not None:
+                fields[key] = "\n".join(value_lines).strip()
+            key = match.group("key").strip()
+            value_lines = [match.group("value")]
+        elif stop_pattern.match(line):
+            # A header (or, for bold config, a plain "- key:" line) ends the current field
+            if key is not None:
+                fields[key] = "\n".join(value_lines).strip()
+            key = None
+        elif key is not None:
+            value_lines.append(line)
+    if key is not None:
+        fields[key] = "\n".join(value_lines).strip()
+    return fields
 
 def setup_logging(output_dir):
     """Sets up logging to a run_debug.log file in the crew's root directory."""
@@ -42,12 +245,7 @@ def setup_logging(output_dir):
     crew_root = os.path.dirname(output_dir)
     log_file = os.path.join(crew_root, "run_debug.log")
     
-    # Reset existing handlers to avoid duplicates
-    root = logging.getLogger()
-    if root.handlers:
-        for handler in root.handlers:
-            root.removeHandler(handler)
-            
+    # force=True removes and closes any existing root handlers, so repeated runs don't duplicate output
     logging.basicConfig(
         filename=log_file,
         level=logging.DEBUG,
@@ -58,6 +256,9 @@ def setup_logging(output_dir):
     logging.info("--- Execution Started ---")
     print(f"--- [DEBUG] Logging details to: {log_file} ---")
 
+# .env is needed at import for the Ollama settings below; dotenv itself is light
+from dotenv import load_dotenv
+
 env_path = os.path.join(PROJECT_ROOT, ".env")
 load_dotenv(env_path)
 
@@ -70,116 +271,124 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL") or f"http://{OLLAMA_SERVER}:{OLLAMA_PORT}"
 os.environ["OLLAMA_API_BASE"] = OLLAMA_BASE_URL
 
-# Initialize LLM with Ollama configuration
-ollama_llm = LLM(
-    model=f"ollama/{OLLAMA_MODEL}",
-    base_url=OLLAMA_BASE_URL,
-    timeout=300,        # Increase timeout to 5 minutes
-    max_retries=3       # Retry 3 times on connection errors
-)
-
-def parse_crew_md(file_path, task_input_content):
+def _ensure_crewai():
+    """Imports crewai and the tools registry once."""
+    global Agent, Task, Crew, Process, LLM, get_tool_agent_tools
+    if Agent is not None:
+        return
+    from crewai import Agent, Task, Crew, Process, LLM
+    # Import tools registry
+    from tools_registry import get_tool_agent_tools
+
+def _get_llm(model_name):
+    """Returns the LLM for model_name, created once per process and shared by every agent using it."""
+    llm = _llm_cache.get(model_name)
+    if llm is None:
+        _ensure_crewai()
+        llm = _llm_cache[model_name] = LLM(
+            model=model_name,
+            base_url=OLLAMA_BASE_URL,
+            timeout=300,        # Increase timeout to 5 minutes
+            max_retries=3       # Retry 3 times on connection errors
+        )
+    return llm
+
+def _get_default_llm():
+    """Returns the LLM for the configured OLLAMA_MODEL, created on first request."""
+    return _get_llm(f"ollama/{OLLAMA_MODEL}")
+
+def parse_crew_md(file_path, task_input_content, skip_outputs=frozenset()):
     def parse_markdown_fields(markdown_block, is_config=False):
-        parsed_data = {}
-        
-        # Enhanced regex patterns for better flexibility
-        if is_config:
-            # Pattern for config fields: "- Key: value" or "- **Key**: value"
-            field_patterns = [
-                r"^\s*-\s*\*\*(?P<key>[^:]+?)\*\*\s*:(?P<value>.*?)(?=\n\s*-\s*(?:\*\*[^:]+?\*\*|[^:]+?):|\n\s*##[^#]|\Z)",
-                r"^\s*-\s*(?P<key>[^:]+?)\s*:(?P<value>.*?)(?=\n\s*-\s*[^:]+?:|\n\s*##[^#]|\Z)"
-            ]
-        else:
-            # Pattern for agents/tasks: "- **Key**: value" (most common)
-            field_patterns = [
-                r"^\s*-\s*\*\*(?P<key>[^:]+?)\*\*\s*:(?P<value>.*?)(?=\n\s*-\s*\*\*[^:]+?\*\*\s*:|\n\s*###|\Z)",
-                # Fallback for simpler format
-                r"^\s*-\s*(?P<key>[^:]+?)\s*:(?P<value>.*?)(?=\n\s*-\s*[^:]+?:|\n\s*###|\Z)"
-            ]
-        
-        # Try each pattern until we find matches
-        for pattern in field_patterns:
-            for match in re.finditer(pattern, markdown_block, re.DOTALL | re.IGNORECASE | re.MULTILINE):
-                key = match.group("key").strip()
-                value = match.group("value").strip()
-                parsed_data[key] = value
+        # Single line scan per pattern pair, bold keys first, plain keys as fallback
+        for line_pattern, stop_pattern in (_CONFIG_FIELD_PATTERNS if is_config else _AGENT_FIELD_PATTERNS):
+            parsed_data = _scan_fields(markdown_block, line_pattern, stop_pattern)
             if parsed_data:  # If we found matches with this pattern, stop
-                break
-                
-        return parsed_data
+                return parsed_data
+        return {}
     
-    def validate_crew_structure(content):
-        """Validate Crew.md structure and return detailed error messages"""
+    def validate_crew_structure(sections):
+        """Validate Crew.md structure; returns (error messages, parsed Configuration fields)"""
         errors = []
+        config_fields = {}
         
         # Check for required sections
-        if not re.search(r'^# Crew Team:', content, re.MULTILINE):
+        if sections["title"] is None:
             errors.append("Missing or malformed crew title (expected: '# Crew Team: [Name]')")
         
-        config_section = re.search(r'## Configuration(.*?)(## Agents|$)', content, re.DOTALL)
-        if not config_section:
+        if "Configuration" not in sections:
             errors.append("Missing '## Configuration' section")
         else:
-            config_fields = parse_markdown_fields(config_section.group(1), is_config=True)
+            config_fields = parse_markdown_fields(sections["Configuration"], is_config=True)
             if "Architecture" not in config_fields:
                 errors.append("Missing 'Architecture' in Configuration section")
         
-        agents_section = re.search(r'## Agents(.*?)(## Tasks|$)', content, re.DOTALL)
-        if not agents_section:
+        if "Agents" not in sections:
             errors.append("Missing '## Agents' section")
         else:
-            agent_blocks = re.findall(r'### (.*?)\n(.*?)(?=### |$)', agents_section.group(1), re.DOTALL)
-            if not agent_blocks:
+            if next(_iter_blocks(sections["Agents"]), None) is None:
                 errors.append("No agents found in '## Agents' section")
         
-        tasks_section = re.search(r'## Tasks(.*)', content, re.DOTALL)
-        if not tasks_section:
+        if "Tasks" not in sections:
             errors.append("Missing '## Tasks' section")
         else:
-            task_blocks = re.findall(r'### (.*?)\n(.*?)(?=### |$)', tasks_section.group(1), re.DOTALL)
-            if not task_blocks:
+            if next(_iter_blocks(sections["Tasks"]), None) is None:
                 errors.append("No tasks found in '## Tasks' section")
         
-        return errors
+        return errors, config_fields
 
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
+        # Resolved once per parse; every [[file]] lookup starts from the crew's input/ folder
+        crew_input_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), "input")
+
+        # Locate sections once; validation and parsing share them
+        sections = _split_sections(content)
 
         # Validate Crew.md structure before parsing
-        validation_errors = validate_crew_structure(content)
+        validation_errors, config_fields = validate_crew_structure(sections)
         if validation_errors:
             error_msg = "Crew.md validation failed:\n" + "\n".join(f"  - {error}" for error in validation_errors)
             print(error_msg)
             logging.error(f"Crew.md validation failed: {validation_errors}")
             return None, {}, [], "sequential", None
 
+        _ensure_crewai()
+
         # Parse Crew Title
-        title_match = re.search(r'^# Crew Team: (.*)', content, re.MULTILINE)
-        crew_title = title_match.group(1).strip() if title_match else "Unnamed Crew"
+        crew_title = sections["title"] or "Unnamed Crew"
 
         # Initialize configuration defaults
         crew_architecture = "sequential"
         crew_supervisor_agent_name = None
 
-        # Parse Configuration section
-        config_section_match = re.search(r'## Configuration(.*?)(## Agents|$)', content, re.DOTALL)
-        if config_section_match:
-            config_content = config_section_match.group(1)
-            config_fields = parse_markdown_fields(config_content, is_config=True)
+        # Configuration fields were already parsed during validation
+        if "Configuration" in sections:
             crew_architecture = config_fields.get("Architecture", "sequential").lower()
             crew_supervisor_agent_name = config_fields.get("Supervisor Agent")
             if crew_supervisor_agent_name and crew_supervisor_agent_name.lower() == 'none':
                 crew_supervisor_agent_name = None
         
-        # Split into Agents and Tasks sections
-        agents_section = re.search(r'## Agents(.*?)(## Tasks|$)', content, re.DOTALL)
-        tasks_section = re.search(r'## Tasks(.*)', content, re.DOTALL)
+        # Agents and Tasks sections
+        agents_section = sections.get("Agents")
+        tasks_section = sections.get("Tasks")
+
+        # Try to use a provided browser mode if possible (via some global or passed arg)
+        # IMPORTANT: We need browser_mode for tool agents. Since it's in run_crew, 
+        # we should probably pass it down or use a global.
+        # As a quick fix, we'll look for it in sys.argv; headless by default.
+        b_mode = 'headless'
+        if '--browser-mode' in sys.argv:
+            idx = sys.argv.index('--browser-mode')
+            if idx + 1 < len(sys.argv):
+                b_mode = sys.argv[idx+1]
+
+        # Tool name -> tool, built on the first agent that requests tools
+        tool_by_name = None
 
         agents = {}
-        if agents_section:
-            agent_blocks = re.findall(r'### (.*?)\n(.*?)(?=### |$)', agents_section.group(1), re.DOTALL)
-            for name, details in agent_blocks:
+        if agents_section is not None:
+            for name, details in _iter_blocks(agents_section):
                 name = name.strip()
                 agent_fields = parse_markdown_fields(details)
                 
@@ -190,48 +399,33 @@ def parse_crew_md(file_path, task_input_content):
                     if not custom_model_name.startswith("ollama/"):
                         custom_model_name = f"ollama/{custom_model_name}"
                     
-                    agent_llm = LLM(
-                        model=custom_model_name,
-                        base_url=OLLAMA_BASE_URL,
-                        timeout=300,
-                        max_retries=3
-                    )
+                    agent_llm = _get_llm(custom_model_name)
                     print(f"Agent {name} using custom model: {custom_model_name}")
                 else:
-                    agent_llm = ollama_llm # Default from config
+                    agent_llm = _get_default_llm() # Default from config
                 
                 # Check if this agent has tools (Tool Agent)
                 tools_string = agent_fields.get("Tools", "")
                 agent_tools = []
                 
                 if tools_string:
-                    # Load tools from tools registry
-                    # Try to use a provided browser mode if possible (via some global or passed arg)
-                    # For now, we'll try to find where browser_mode comes from.
-                    # It's not passed to parse_crew_md, so we might need a better way.
-                    # Let's assume headless as default if we can't get it.
-                    
-                    # IMPORTANT: We need browser_mode here. Since it's in run_crew, 
-                    # we should probably pass it down or use a global.
-                    # As a quick fix, we'll look for it in sys.argv if not passed.
-                    
-                    b_mode = 'headless'
-                    if '--browser-mode' in sys.argv:
-                        idx = sys.argv.index('--browser-mode')
-                        if idx + 1 < len(sys.argv):
-                            b_mode = sys.argv[idx+1]
-
-                    available_tools = get_tool_agent_tools(crew_name=crew_title, browser_mode=b_mode)
-                    tool_names = [t.strip() for t in tools_string.split(',')]
+                    # Load tools from tools registry (built once per crew/browser mode)
+                    if tool_by_name is None:
+                        tool_by_name = {t.name: t for t in get_tool_agent_tools(crew_name=crew_title, browser_mode=b_mode)}
+                    tool_names = list(dict.fromkeys(t.strip() for t in tools_string.split(',')))
                     
-                    for tool in available_tools:
-                        if tool.name in tool_names:
+                    for tool_name in tool_names:
+                        tool = tool_by_name.get(tool_name)
+                        if tool is not None:
                             agent_tools.append(tool)
                             print(f"  ✅ Loaded tool '{tool.name}' for agent '{name}'")
                     
                     if not agent_tools:
                         print(f"  ⚠️ No tools loaded for agent '{name}' - requested tools [{tools_string}] not found.")
-                        print(f"  Available tools: {[t.name for t in available_tools]}")
+                        print(f"  Available tools: {list(tool_by_name)}")
+                    elif len(agent_tools) < len(tool_names):
+                        missing = [n for n in tool_names if n not in tool_by_name]
+                        print(f"  ⚠️ Requested tools not found for agent '{name}': {missing}")
                 else:
                     print(f"  ℹ️ No tools specified for agent '{name}'")
                 
@@ -245,16 +439,26 @@ def parse_crew_md(file_path, task_input_content):
                     allow_delegation=False
                 )
 
+        # Resolved path -> injected (possibly sampled) content, so each [[file]] is read once
+        file_cache = {}
+        # Directory -> entry names, so candidate lookups are set membership tests
+        dir_cache = {}
+
         tasks_data = []
-        if tasks_section:
-            task_blocks = re.findall(r'### (.*?)\n(.*?)(?=### |$)', tasks_section.group(1), re.DOTALL)
-            for task_header, details in task_blocks:
+        if tasks_section is not None:
+            # First pass: parse task blocks and apply {task_input}; collect [[file]] names
+            pending_tasks = []
+            for task_header, details in _iter_blocks(tasks_section):
                 task_header = task_header.strip()
                 # Extract custom output file if specified in [Output: filename.md]
-                output_file_match = re.search(r'\[Output:\s*(.*?)\]', task_header)
+                output_file_match = _OUTPUT_FILE_RE.search(task_header)
                 custom_output_file = output_file_match.group(1).strip() if output_file_match else None
                 # Clean task name for internal logic
-                task_name = re.sub(r'\[Output:.*?\]', '', task_header).strip()
+                task_name = _OUTPUT_TAG_RE.sub('', task_header).strip()
+
+                if custom_output_file in skip_outputs:
+                    print(f"--- [SKIP] Skipping task '{task_name}' because output already exists. ---")
+                    continue
 
                 task_fields = parse_markdown_fields(details)
                 
@@ -271,69 +475,51 @@ def parse_crew_md(file_path, task_input_content):
                         # Only prepend if no explicit placeholder AND Task.md is not empty
                         desc_text = f"Context from Task.md:\n{task_input_content}\n\nTask Description: {desc_text}"
 
-                    # Injection 2: Dynamic [[filename]] support
-                    file_placeholders = re.findall(r'\[\[(.*?)\]\]', desc_text)
-                    crew_dir = os.path.dirname(os.path.abspath(file_path))
-                    crew_input_dir = os.path.join(crew_dir, "input")
-                    
-                    for f_name in file_placeholders:
-                        f_name = f_name.strip()
-                        # Look in 3 places: 
-                        # 1. Crew's input/ folder
-                        # 2. Global input/ folder
-                        # 3. Project root
-                        crew_specific_path = os.path.join(crew_input_dir, f_name)
-                        # If f_name starts with 'input/', also try without 'input/' prefix for crew folder
-                        if f_name.startswith("input/") or f_name.startswith("input\\"):
-                            f_name_short = f_name[6:]
-                            crew_specific_path_alt = os.path.join(crew_input_dir, f_name_short)
-                        else:
-                            crew_specific_path_alt = None
-
-                        input_path = os.path.join(INPUT_DIR, f_name)
-                        root_path = os.path.join(PROJECT_ROOT, f_name)
-                        
-                        file_path_resolved = None
-                        if os.path.exists(crew_specific_path):
-                            file_path_resolved = crew_specific_path
-                        elif crew_specific_path_alt and os.path.exists(crew_specific_path_alt):
-                            file_path_resolved = crew_specific_path_alt
-                        elif os.path.exists(input_path):
-                            file_path_resolved = input_path
-                        elif os.path.exists(root_path):
-                            file_path_resolved = root_path
-                        
-                        if file_path_resolved:
-                            with open(file_path_resolved, 'r', encoding='utf-8') as f:
-                                f_content = f.read()
-                            
-                            # Apply sampling if the file is large
-                            if len(f_content) > 50000:
-                                print(f"Sampling large file: {f_name}")
-                                chunk = 15000
-                                f_content = (
-                                    f"[WARNING: Content of {f_name} has been sampled due to its large size ({len(f_content)} chars). "
-                                    f"Significant portions of the document have been omitted. "
-                                    f"If the analysis requires specific sections not shown below, please request them individually.]\n\n"
-                                    f"--- START OF FILE ---\n{f_content[:chunk]}\n\n"
-                                    f"--- MIDDLE OF FILE ---\n{f_content[len(f_content)//2 - chunk//2 : len(f_content)//2 + chunk//2]}\n\n"
-                                    f"--- END OF FILE ---\n{f_content[-chunk:]}"
-                                )
-                            
-                            desc_text = desc_text.replace(f"[[{f_name}]]", f_content)
-                            print(f"Injected content from {file_path_resolved}")
-                        else:
-                            print(f"Warning: File [[{f_name}]] not found in crew input/, global input/ or project root.")
-
-                    tasks_data.append({
-                        "name": task_name,
-                        "custom_output": custom_output_file,
-                        "task": Task(
-                            description=desc_text,
-                            expected_output=task_fields.get("Expected Output", ""),
-                            agent=agent_inst
-                        )
-                    })
+                    file_placeholders = {f_name.strip() for f_name in _FILE_PLACEHOLDER_RE.findall(desc_text)}
+                    pending_tasks.append((task_name, custom_output_file, task_fields, agent_inst, desc_text, file_placeholders))
+
+            # Injection 2: Dynamic [[filename]] support
+            # Each distinct file is resolved and read once, concurrently (reads release the GIL)
+            unique_names = list(dict.fromkeys(f_name for *_, names in pending_tasks for f_name in names))
+            def load_file(f_name):
+                return _read_first_candidate(_placeholder_candidates(f_name, crew_input_dir), f_name, file_cache, dir_cache)
+
+            resolved_files = {}
+            if len(unique_names) == 1:
+                # Nothing to overlap; skip the pool startup
+                resolved_files[unique_names[0]] = load_file(unique_names[0])
+            elif unique_names:
+                # Scan the shared search directories up front so workers don't race to scan them
+                for directory in (crew_input_dir, INPUT_DIR, PROJECT_ROOT):
+                    _dir_entries(directory, dir_cache)
+                with ThreadPoolExecutor(max_workers=min(8, len(unique_names))) as executor:
+                    resolved_files = dict(zip(unique_names, executor.map(load_file, unique_names)))
+
+            def inject_file(match):
+                f_name = match.group(1).strip()
+                file_path_resolved, f_content = resolved_files[f_name]
+                if file_path_resolved:
+                    print(f"Injected content from {file_path_resolved}")
+                    return f_content
+                print(f"Warning: File [[{f_name}]] not found in crew input/, global input/ or project root.")
+                return match.group(0)
+
+            for task_name, custom_output_file, task_fields, agent_inst, desc_text, file_placeholders in pending_tasks:
+                if file_placeholders:
+                    # Single substitution pass over the description
+                    desc_text = _FILE_PLACEHOLDER_RE.sub(inject_file, desc_text)
+
+                tasks_data.append({
+                    "name": task_name,
+                    "name_lower": task_name.lower(), # For keyword matching in run_crew
+                    "custom_output": custom_output_file,
+                    "prefix_parts": [], # Injected context, prepended in run_crew
+                    "task": Task(
+                        description=desc_text,
+                        expected_output=task_fields.get("Expected Output", ""),
+                        agent=agent_inst
+                    )
+                })
 
         return crew_title, agents, tasks_data, crew_architecture, crew_supervisor_agent_name
 
@@ -357,7 +543,9 @@ def run_crew(crew_file, task_file, output_dir=None, enable_web_search=False, deb
         crew_dir = os.path.dirname(os.path.abspath(crew_file))
         OUTPUT_DIR = os.path.join(crew_dir, "output")
         
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if OUTPUT_DIR not in _OUTPUT_READY:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        _OUTPUT_READY.add(OUTPUT_DIR)
     os.environ["CREW_OUTPUT_DIR"] = OUTPUT_DIR
     if debug:
         setup_logging(OUTPUT_DIR)
@@ -368,12 +556,17 @@ def run_crew(crew_file, task_file, output_dir=None, enable_web_search=False, deb
         
         print(f"--- Loading Crew from {crew_file} ---")
         
-        task_input_content = ""
-        if os.path.exists(task_file):
-            with open(task_file, 'r', encoding='utf-8') as f:
-                task_input_content = f.read()
+        task_input_content = _read_text(task_file) or ""
         
-        title, agents_dict, tasks_data, architecture, supervisor_agent_name = parse_crew_md(crew_file, task_input_content)
+        # Skip Style Analysis if book_summary.md already exists in output;
+        # its task is dropped during parsing, before a Task is built for it
+        book_summary_path = os.path.join(OUTPUT_DIR, "book_summary.md")
+        summary_to_inject = _read_text(book_summary_path)
+        if summary_to_inject is not None:
+            print(f"--- [DEBUG] book_summary.md found in output/. Checking tasks to skip... ---")
+        skip_outputs = {"book_summary.md"} if summary_to_inject is not None else frozenset()
+        
+        title, agents_dict, tasks_data, architecture, supervisor_agent_name = parse_crew_md(crew_file, task_input_content, skip_outputs)
         
         # Check if parsing failed
         if title is None:
@@ -440,44 +633,37 @@ def run_crew(crew_file, task_file, output_dir=None, enable_web_search=False, deb
                     logging.error(msg)
                     return
 
-        # 1. Logic: Skip Style Analysis if book_summary.md already exists in output
-        book_summary_path = os.path.join(OUTPUT_DIR, "book_summary.md")
-        if os.path.exists(book_summary_path):
-            print(f"--- [DEBUG] book_summary.md found in output/. Checking tasks to skip... ---")
-            filtered_tasks = []
-            summary_to_inject = None
-            
-            # Read existing summary once
-            with open(book_summary_path, "r", encoding="utf-8") as f:
-                summary_to_inject = f.read()
+        # Flag production tasks once; both injection steps below reuse it
+        for td in tasks_data:
+            td["is_production"] = _PRODUCTION_RE.search(td["name_lower"]) is not None
 
+        # 1. Logic: With the style task skipped, inject its existing output into the development task
+        if summary_to_inject is not None:
             for td in tasks_data:
-                if td["custom_output"] == "book_summary.md":
-                    print(f"--- [SKIP] Skipping task '{td['name']}' because output already exists. ---")
-                else:
-                    # If we are skipping the style task, inject its content into the development task
-                    if any(k in td["name"].lower() for k in ["enrich", "develop", "write"]):
-                        print(f"--- [INJECT] Injecting existing book_summary.md into '{td['name']}' ---")
-                        td["task"].description = f"Existing Style Guide (from book_summary.md):\n{summary_to_inject}\n\n{td['task'].description}"
-                    filtered_tasks.append(td)
-            
-            tasks_data = filtered_tasks
+                if td["is_production"]:
+                    print(f"--- [INJECT] Injecting existing book_summary.md into '{td['name']}' ---")
+                    td["prefix_parts"].append(f"Existing Style Guide (from book_summary.md):\n{summary_to_inject}")
 
         # 2. Logic: Inject Task_Feedback.md if it exists in output
         feedback_path = os.path.join(OUTPUT_DIR, "Task_Feedback.md")
-        if os.path.exists(feedback_path):
+        feedback_content = _read_text(feedback_path)
+        if feedback_content is not None:
             print(f"--- [FEEDBACK] Task_Feedback.md found in output/. Injecting into Enrichment task... ---")
-            with open(feedback_path, "r", encoding='utf-8') as f:
-                feedback_content = f.read()
             
             for td in tasks_data:
                 # Inject into the Enrichment/Development task
-                if any(k in td["name"].lower() for k in ["enrich", "develop", "write"]):
+                if td["is_production"]:
                     print(f"--- [INJECT] Injecting feedback into '{td['name']}' ---")
-                    td["task"].description = f"PREVIOUS EDITORIAL FEEDBACK TO ADDRESS:\n{feedback_content}\n\n{td['task'].description}"
+                    # Feedback goes ahead of any style guide
+                    td["prefix_parts"].insert(0, f"PREVIOUS EDITORIAL FEEDBACK TO ADDRESS:\n{feedback_content}")
                     # We only inject into the first matching task (the main production one)
                     break
 
+        # Build each injected description with a single join instead of repeated prepends
+        for td in tasks_data:
+            if td["prefix_parts"]:
+                td["task"].description = "\n\n".join(td["prefix_parts"] + [td["task"].description])
+
         if not agent_list or not tasks_data:
             print("Error: No agents or tasks found. Check your Crew.md syntax.")
             logging.error("No agents or tasks parsed.")
@@ -487,8 +673,10 @@ def run_crew(crew_file, task_file, output_dir=None, enable_web_search=False, deb
         if manager_agent:
             print(f"    Manager Agent: {manager_agent.role}")
         
+        # Identity, not ==: pydantic's __eq__ compares agents field by field
+        crew_agents = agent_list if manager_agent is None else [a for a in agent_list if a is not manager_agent]
         crew_params = {
-            "agents": [a for a in agent_list if a != manager_agent] if manager_agent else agent_list,
+            "agents": crew_agents,
             "tasks": [td["task"] for td in tasks_data],
             "process": crew_process,
             "verbose": True
@@ -498,7 +686,7 @@ def run_crew(crew_file, task_file, output_dir=None, enable_web_search=False, deb
             crew_params["manager_agent"] = manager_agent
         elif crew_process == Process.hierarchical:
             print(f"--- [INFO] Hierarchical process detected without specific manager agent. Using default LLM for manager. ---")
-            crew_params["manager_llm"] = ollama_llm
+            crew_params["manager_llm"] = _get_default_llm()
 
         crew = Crew(**crew_params)
 
@@ -506,30 +694,28 @@ def run_crew(crew_file, task_file, output_dir=None, enable_web_search=False, deb
         result = crew.kickoff()
         logging.info("Kickoff completed successfully.")
         
-        # Process outputs
+        # Process outputs: collect per target file so tasks sharing a file are concatenated
+        outputs = {}
         for td in tasks_data:
-            t_name = td["name"].lower()
             t_output = td["task"].output.raw if hasattr(td["task"].output, 'raw') else str(td["task"].output)
             
             # Priority 1: Custom output file
             if td["custom_output"]:
                 target_f = td["custom_output"]
             # Priority 2: Keyword-based routing
-            elif any(k in t_name for k in ["plan", "strategy", "analysis", "guide", "outline"]):
-                target_f = "Task_Plan.md"
-            elif any(k in t_name for k in ["result", "execute", "enrich", "develop", "write", "creation"]):
-                target_f = "Task_Result.md"
-            elif any(k in t_name for k in ["feedback", "evaluation", "review", "edit"]):
-                target_f = "Task_Feedback.md"
             else:
-                target_f = None
+                route = _ROUTE_RE.match(td["name_lower"])
+                target_f = _ROUTE_TARGETS[route.lastgroup] if route else None
 
             if target_f:
-                # Write to output directory
-                output_path = os.path.join(OUTPUT_DIR, target_f)
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(t_output)
-                print(f"Saved output of '{td['name']}' to {output_path}")
+                outputs.setdefault(target_f, []).append((td["name"], t_output))
+
+        # Write each output file once
+        for target_f, parts in outputs.items():
+            output_path = os.path.join(OUTPUT_DIR, target_f)
+            _write_atomic(output_path, "\n\n".join(t_output for _, t_output in parts))
+            for task_name, _ in parts:
+                print(f"Saved output of '{task_name}' to {output_path}")
 
         print("\n\n########################")
         print(f"## FINAL RESULT FOR {title}:")
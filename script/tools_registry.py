@@ -4,7 +4,9 @@ Contains essential tools for file operations, web search, and project navigation
 """
 
 import os
+import threading
 import warnings
+from functools import lru_cache
 from typing import Type, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
@@ -49,6 +51,59 @@ class BraveSearchTool(BaseTool):
         except Exception as e:
             return f"Error searching internet: {str(e)}"
 
+# Common development file types listed by FileIntelligenceTool
+_DEV_FILE_SUFFIXES = (".py", ".md", ".env", ".txt", ".json", ".yaml", ".yml", ".toml", ".ini")
+# Directories FileIntelligenceTool never descends into (plus the crew's output dir)
+_EXCLUDE_DIRS = frozenset(["conda", "__pycache__", ".git", ".venv", "venv", "node_modules", "output"])
+
+def _find_project_files(root, exclude_dirs, limit, scanned_dirs=None):
+    """
+    Returns up to limit development files under root, in os.walk (top-down) order.
+    Scans with os.scandir and stops as soon as enough files are found.
+    If scanned_dirs is given, (directory, mtime_ns) is appended for every directory read.
+    """
+    found_files = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            # mtime taken before listing, so a change during the scan still invalidates it
+            if scanned_dirs is not None:
+                scanned_dirs.append((directory, os.stat(directory).st_mtime_ns))
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # Like os.walk: symlinked directories are not followed
+                if entry.name not in exclude_dirs and not entry.is_symlink():
+                    subdirs.append(entry.path)
+            # Check if file matches common development file types
+            elif entry.name.endswith(_DEV_FILE_SUFFIXES):
+                found_files.append(entry.path)
+                if len(found_files) >= limit:
+                    return found_files
+        # Reversed so the first sub-directory is scanned next
+        stack.extend(reversed(subdirs))
+    return found_files
+
+def _dirs_unchanged(scanned_dirs):
+    """True if none of the scanned directories gained, lost or renamed an entry since the scan."""
+    try:
+        return all(os.stat(directory).st_mtime_ns == mtime_ns for directory, mtime_ns in scanned_dirs)
+    except OSError:
+        return False
+
+# (cwd, excluded dirs) -> (scanned dirs with mtimes, listed files); repeated queries skip the scan
+_FILE_INTEL_CACHE = {}
+_FILE_INTEL_CACHE_SIZE = 32
+
 class FileIntelligenceInput(BaseModel):
     """Input schema for FileIntelligenceTool."""
     query: str = Field(..., description="A query string describing what you are looking for in the project (e.g., 'find all Python files', 'locate configuration files').")
@@ -64,26 +119,48 @@ class FileIntelligenceTool(BaseTool):
 
     def _run(self, query: str) -> str:
         """Find relevant files based on query."""
-        found_files = []
         # Get dynamic output dir from environment or default to local 'output'
         current_output_dir = os.environ.get("CREW_OUTPUT_DIR", "output")
         output_name = os.path.basename(current_output_dir)
         
-        exclude_dirs = ["conda", "__pycache__", ".git", ".venv", "venv", output_name, "node_modules", "output"]
-        
-        for root, dirs, files in os.walk(os.getcwd()):
-            # Filter directories in-place to prevent walking into excluded ones
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-            
-            for file in files:
-                # Check if file matches common development file types
-                if any(ext in file for ext in [".py", ".md", ".env", ".txt", ".json", ".yaml", ".yml", ".toml", ".ini"]):
-                    found_files.append(os.path.relpath(os.path.join(root, file)))
+        exclude_dirs = _EXCLUDE_DIRS | {output_name}
         
-        # Limit results to prevent overwhelming responses
-        limited_results = found_files[:20]
+        cwd = os.getcwd()
+        key = (cwd, exclude_dirs)
+        cached = _FILE_INTEL_CACHE.get(key)
+        if cached is not None and _dirs_unchanged(cached[0]):
+            limited_results = cached[1]
+        else:
+            scanned_dirs = []
+            # Limit results to prevent overwhelming responses
+            # Paths all start with cwd, so slicing replaces a getcwd()-based relpath per file
+            cwd_prefix = os.path.join(cwd, "")
+            limited_results = [
+                path[len(cwd_prefix):] if path.startswith(cwd_prefix) else os.path.relpath(path, cwd)
+                for path in _find_project_files(cwd, exclude_dirs, 20, scanned_dirs)
+            ]
+            if key not in _FILE_INTEL_CACHE and len(_FILE_INTEL_CACHE) >= _FILE_INTEL_CACHE_SIZE:
+                # Drop the oldest entry
+                del _FILE_INTEL_CACHE[next(iter(_FILE_INTEL_CACHE))]
+            _FILE_INTEL_CACHE[key] = (tuple(scanned_dirs), limited_results)
         return f"Found {len(limited_results)} relevant files based on query '{query}':\n" + "\n".join(limited_results)
 
+def _resolve_output_dir():
+    """Returns the crew's output directory: CREW_OUTPUT_DIR (set per run by run_crew) or ./output."""
+    return os.environ.get("CREW_OUTPUT_DIR") or os.path.join(os.getcwd(), "output")
+
+# Output directories already created in this process, so writes skip the makedirs stat
+_ENSURED_DIRS = set()
+_ENSURED_DIRS_LOCK = threading.Lock()
+
+def _ensure_dir(directory, force=False):
+    """Creates directory once per process (again if force is set)."""
+    if not force and directory in _ENSURED_DIRS:
+        return
+    with _ENSURED_DIRS_LOCK:
+        os.makedirs(directory, exist_ok=True)
+        _ENSURED_DIRS.add(directory)
+
 class FileWriteInput(BaseModel):
     """Input schema for FileWriteTool."""
     filename: str = Field(..., description="The name of the file to write (e.g., 'main.py', 'config.json').")
@@ -100,17 +177,19 @@ class FileWriteTool(BaseTool):
 
     def _run(self, filename: str, content: str) -> str:
         try:
-            # Use dynamic output directory from environment or default to local "output"
-            output_dir = os.environ.get("CREW_OUTPUT_DIR")
-            if not output_dir:
-                output_dir = os.path.join(os.getcwd(), "output")
-            
-            os.makedirs(output_dir, exist_ok=True)
+            output_dir = _resolve_output_dir()
+            _ensure_dir(output_dir)
             
             filepath = os.path.join(output_dir, filename)
             
             # Write content to file
-            with open(filepath, "w", encoding="utf-8") as f:
+            try:
+                f = open(filepath, "w", encoding="utf-8")
+            except FileNotFoundError:
+                # The directory was removed since it was first created (e.g. output cleared)
+                _ensure_dir(output_dir, force=True)
+                f = open(filepath, "w", encoding="utf-8")
+            with f:
                 f.write(content)
             
             return f"Successfully wrote to {filepath}"
@@ -121,18 +200,30 @@ def get_tool_agent_tools(crew_name: Optional[str] = None, download_dir: Optional
     """
     Returns a list of tools for the Tool Agent.
     These tools provide comprehensive file operations, web search, and project navigation capabilities.
+    Tool instances are built once per argument combination, BRAVE_API_KEY and
+    working directory; each call gets shallow copies of them, since BaseTool.run
+    updates per-instance state such as current_usage_count.
     """
+    tools = _build_tool_agent_tools(crew_name, download_dir, browser_mode, os.getenv("BRAVE_API_KEY"), os.getcwd())
+    return [tool.model_copy() for tool in tools]
+
+def reset_tool_cache():
+    """Drops the cached tool instances so the next call builds fresh ones."""
+    _build_tool_agent_tools.cache_clear()
+    _shared_tools.cache_clear()
+
+@lru_cache(maxsize=4)
+def _shared_tools(brave_key, cwd):
+    """Tools that don't depend on the crew, built once and reused by every argument combination."""
     tools = []
     
     # Brave Search Tool - for web searches (requires BRAVE_API_KEY in .env)
-    brave_key = os.getenv("BRAVE_API_KEY")
     if brave_key and brave_key.strip() and brave_key != "NA":
         tools.append(BraveSearchTool(api_key=brave_key))
     else:
         print("Warning: BRAVE_API_KEY not found or invalid in .env file. BraveSearchTool will not be available.")
     
     # File operations tools - restricted to current directory for safety/speed
-    cwd = os.getcwd()
     tools.append(FileReadTool())
     tools.append(FileWriteTool())
     
@@ -141,6 +232,11 @@ def get_tool_agent_tools(crew_name: Optional[str] = None, download_dir: Optional
     
     # Advanced file intelligence tool
     tools.append(FileIntelligenceTool())
+    return tuple(tools)
+
+@lru_cache(maxsize=16)
+def _build_tool_agent_tools(crew_name, download_dir, browser_mode, brave_key, cwd):
+    tools = list(_shared_tools(brave_key, cwd))
     
     # Anna's Archive tool
     try:
@@ -167,7 +263,7 @@ def get_tool_agent_tools(crew_name: Optional[str] = None, download_dir: Optional
     except Exception as e:
         print(f"Warning: Could not initialize AskBookTool in registry: {e}")
     
-    return tools
+    return tuple(tools)
 
 def get_available_tools():
     """
@@ -188,7 +284,8 @@ def get_available_tools():
         })
     
     # Check for missing requirements
-    missing_brave_key = not os.getenv("BRAVE_API_KEY") or os.getenv("BRAVE_API_KEY") in ["", "NA"]
+    brave_key = os.getenv("BRAVE_API_KEY")
+    missing_brave_key = not brave_key or brave_key in ["", "NA"]
     
     if missing_brave_key:
         tool_info["missing_requirements"] = {
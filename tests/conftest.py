@@ -0,0 +1,84 @@
+"""Shared fixtures for the AutoCrewAI test suite."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+_REPO_DEFAULT_CREW = Path(__file__).resolve().parent.parent / "crews" / "default"
+
+
+@pytest.fixture(scope="session")
+def _session_crew_model(tmp_path_factory):
+    """One CrewModel for the whole run (the GUI model needs python-dotenv).
+
+    CrewModel resolves crews/ against the working directory, so it is built
+    from a temp directory rather than wherever pytest was started.
+    """
+    pytest.importorskip("dotenv", reason="python-dotenv is not installed")
+    from app.gui_models import CrewModel
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("crew_model_cwd"))
+        model = CrewModel()
+        model.crews_dir = os.path.abspath(model.crews_dir)
+        model.set_active_crew(model.current_crew_name)
+    return model
+
+
+@pytest.fixture
+def crew_model(_session_crew_model):
+    """The shared CrewModel, with its attributes restored after each test."""
+    state = dict(vars(_session_crew_model))
+    yield _session_crew_model
+    vars(_session_crew_model).clear()
+    vars(_session_crew_model).update(state)
+
+
+@pytest.fixture(scope="session")
+def default_crew_dir(tmp_path_factory):
+    """A crews/ folder holding a session-wide copy of the repo's reference default crew."""
+    root = tmp_path_factory.mktemp("crews_ro")
+    shutil.copytree(_REPO_DEFAULT_CREW, root / "default")
+    return root
+
+
+@pytest.fixture
+def crew_root(tmp_path, monkeypatch):
+    """Runs the test from tmp_path with an empty crews/ folder, like a fresh checkout."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "crews").mkdir()
+    return tmp_path
+
+
+@pytest.fixture
+def crews_root(crew_model, default_crew_dir, crew_root, monkeypatch):
+    """Points crew_model at the crew_root crews/ folder seeded with the default crew."""
+    root = crew_root / "crews"
+    shutil.copytree(default_crew_dir, root, dirs_exist_ok=True)
+    monkeypatch.setattr(crew_model, "crews_dir", str(root))
+    return root
+
+
+@pytest.fixture(scope="session")
+def tk_root():
+    """A single withdrawn Tk root for GUI tests; skips when no display is available."""
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"No display available: {e}")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+@pytest.fixture(autouse=True)
+def _silence_messageboxes(monkeypatch):
+    """Message boxes would block the test run; monkeypatch restores them after each test."""
+    try:
+        import tkinter.messagebox
+    except ImportError:
+        return
+    for name in ("showinfo", "showwarning", "showerror"):
+        monkeypatch.setattr(tkinter.messagebox, name, lambda *args, **kwargs: None)